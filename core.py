@@ -1,15 +1,15 @@
 import discord
 from discord.ext import commands
 from datetime import datetime
-import aiohttp
 import asyncio
 import asyncpg
 import json
+import time
 
 from discord.ext.commands import ExtensionAlreadyLoaded
 
-with open('credentials.json') as f:
-    credentials = json.load(f)
+from ext.utils import colour_cache, http_client
+from ext.utils.selenium_driver import DriverPool
 
 
 async def run():
@@ -21,8 +21,7 @@ async def run():
         for i in bot.cogs:
             bot.unload_extension(i.name)
         await db.close()
-        bot.fixture_driver.quit()
-        bot.score_driver.quit()
+        bot.browsers.close()
         await bot.logout()
 
 
@@ -38,12 +37,12 @@ class Bot(commands.Bot):
             activity=discord.Game(name="Use .tb help"),
             intents=intents
         )
-        self.fixture_driver = None
-        self.score_driver = None
+        self.browsers = DriverPool(**credentials.get("Browsers", {}))
         self.db = kwargs.pop("database")
         self.credentials = credentials
         self.initialised_at = datetime.utcnow()
-        self.session = aiohttp.ClientSession(loop=self.loop)
+        self.session = http_client.client = http_client.HTTPClient(loop=self.loop)
+        colour_cache.service.attach(self.db, self.session)
 
     async def on_ready(self):
         print(f'{self.user}: {datetime.now().strftime("%d-%m-%Y %H:%M:%S")}\n-----------------------------------')
@@ -54,16 +53,33 @@ class Bot(commands.Bot):
             'ext.mod', 'ext.mtb', 'ext.notifications', 'ext.nufc', 'ext.quotes', 'ext.reminders', 'ext.scores',
             'ext.sidebar', 'ext.twitter', 'ext.lookups', "ext.transfers", 'ext.tv',
         ]
+        load_times = {}
         for c in load:
+            start = time.perf_counter()
             try:
                 self.load_extension(c)
             except ExtensionAlreadyLoaded:
-                pass
+                continue  # Reconnected, nothing to report.
             except Exception as e:
                 print(f'Failed to load cog {c}\n{type(e).__name__}: {e}')
             else:
                 print(f"Loaded extension {c}")
+            load_times[c] = time.perf_counter() - start
+        
+        if load_times:
+            print(f"Extensions loaded in {sum(load_times.values()):.2f}s, slowest first:")
+            for c, seconds in sorted(load_times.items(), key=lambda i: i[1], reverse=True):
+                print(f"\t{c:<20} {seconds:.3f}s")
+        
+        # Start browsers off the event loop now everything else is up, commands will spawn their own if they beat it.
+        if not self.browsers.drivers and not self.browsers.spawning:
+            self.loop.create_task(self.browsers.prewarm())
 
 
-loop = asyncio.get_event_loop()
-loop.run_until_complete(run())
+# Process pool workers are spawned, they re-run this module's imports & must not start a second bot.
+if __name__ == "__main__":
+    with open('credentials.json') as f:
+        credentials = json.load(f)
+    
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(run())
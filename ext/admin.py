@@ -10,7 +10,7 @@ from collections import Counter
 
 from discord.ext.commands import ExtensionNotLoaded
 
-from ext.utils import codeblocks, embed_utils
+from ext.utils import codeblocks, embed_utils, selenium_driver, html_parser
 
 
 class Admin(commands.Cog):
@@ -108,6 +108,68 @@ class Admin(commands.Cog):
         else:
             await ctx.reply(f"```py\n{result}```", mention_author=False)
 
+    @commands.command()
+    @commands.is_owner()
+    async def browsers(self, ctx):
+        """ Show browser pool usage and lease wait times """
+        stats = self.bot.browsers.stats()
+        e = discord.Embed(color=0x2ecc71)
+        e.title = "Browser pool"
+        e.description = f"{stats['drivers']}/{self.bot.browsers.size} drivers, {stats['idle']} idle, " \
+                        f"{stats['depth']} waiting, {stats['recycled']} recycled."
+        for name in ["interactive", "background"]:
+            s = stats[name]
+            e.add_field(name=name.title(), value=f"{s['leases']} leases, {s['queued']} queued, {s['timeouts']} timeouts\n"
+                                                 f"Wait: {s['mean']:.2f}s mean, {s['p95']:.2f}s p95, {s['max']:.2f}s max")
+        
+        cache = selenium_driver.page_cache
+        e.add_field(name="Page cache", value=f"{len(cache.entries)}/{cache.max_entries} pages, {cache.stats['hits']} hits, "
+                                             f"{cache.stats['misses']} misses, {cache.stats['coalesced']} coalesced",
+                    inline=False)
+        
+        images = selenium_driver.image_cache
+        e.add_field(name="Image cache", value=f"{len(images.keys)} images, {images.memory_bytes / 2 ** 20:.1f}MB memory, "
+                                              f"{images.disk_bytes / 2 ** 20:.1f}MB disk, {images.stats['hits']} hits, "
+                                              f"{images.stats['misses']} misses, {images.stats['invalidated']} invalidated",
+                    inline=False)
+        await ctx.reply(embed=e, mention_author=False)
+
+    @commands.command(aliases=["timings"])
+    @commands.is_owner()
+    async def browsertimings(self, ctx, *, qry=None):
+        """ Browser phase timings by command & url pattern, slowest first. Filter with a command, url or phase. """
+        stats = selenium_driver.phase_stats
+        rows = stats.summary(qry)
+        if not rows:
+            return await ctx.reply("No browser timings recorded yet.", mention_author=False)
+        
+        p = commands.Paginator()
+        p.add_line(f"{'command':<28} {'url':<24} {'phase':<10} {'n':>4} {'p50':>6} {'p95':>6} {'max':>6}")
+        for command, pattern, phase, n, p50, p95, worst in rows:
+            p.add_line(f"{command[:28]:<28} {pattern[:24]:<24} {phase:<10} {n:>4} {p50:>6.2f} {p95:>6.2f} {worst:>6.2f}")
+        if stats.slow:
+            p.add_line(f"Over threshold: {dict(stats.slow)}")
+        for page in p.pages:
+            await ctx.reply(page, mention_author=False)
+
+    @commands.command()
+    @commands.is_owner()
+    async def http(self, ctx):
+        """ Requests, errors and latency per upstream host from the shared http client """
+        rows = self.bot.session.stats.summary()
+        if not rows:
+            return await ctx.reply("No http requests recorded yet.", mention_author=False)
+        
+        p = commands.Paginator()
+        p.add_line(f"{'host':<32} {'n':>6} {'err':>4} {'p50':>6} {'p95':>6}")
+        for host, count, errors, p50, p95 in rows:
+            p.add_line(f"{str(host)[:32]:<32} {count:>6} {errors:>4} {p50:>6.2f} {p95:>6.2f}")
+        cache = self.bot.session.cache
+        p.add_line(f"Page cache: {len(cache.entries)} pages, {cache.size / 2 ** 20:.1f}MB, {dict(cache.stats)}")
+        p.add_line(f"Pages parsed off the loop: {dict(html_parser.stats)}")
+        for page in p.pages:
+            await ctx.reply(page, mention_author=False)
+
     @commands.command()
     @commands.is_owner()
     async def guilds(self, ctx):
@@ -1,7 +1,5 @@
-import functools
 from collections import defaultdict
 from copy import deepcopy
-import asyncio
 import datetime
 import typing
 
@@ -11,12 +9,8 @@ import discord
 
 # Custom Utils
 from ext.utils import transfer_tools, football, embed_utils
-from ext.utils.selenium_driver import spawn_driver
 from importlib import reload
 
-# max_concurrency equivalent
-sl_lock = asyncio.Semaphore()
-
 # TODO: Find somewhere to get goal clips from.
 
 
@@ -42,8 +36,6 @@ class Fixtures(commands.Cog):
     """Lookups for past, present and future football matches."""
     def __init__(self, bot):
         self.bot = bot
-        if self.bot.fixture_driver is None:
-            self.bot.fixture_driver = spawn_driver()
         for package in [transfer_tools, football, embed_utils]:
             reload(package)
 
@@ -57,17 +49,16 @@ class Fixtures(commands.Cog):
                 if default is not None:
                     if mode == "team":
                         team_id = default.split('/')[-1]
-                        ftp = functools.partial(football.Team.by_id, team_id, driver=self.bot.fixture_driver)
+                        fsr = await self.bot.browsers.run(football.Team.by_id, team_id)
                     else:
-                        ftp = functools.partial(football.Competition.by_link, default, driver=self.bot.fixture_driver)
-                    fsr = await self.bot.loop.run_in_executor(None, ftp)
+                        fsr = await self.bot.browsers.run(football.Competition.by_link, default)
                     return fsr
             else:
                 err += f"\nA default team or league can be set by moderators using {ctx.prefix}default)"
             await processing_update(status_message, err)
             return None
 
-        search_results = await football.get_fs_results(qry)
+        search_results = await football.get_fs_results(qry, session=self.bot.session)
         
         if not search_results:
             output = f'No search results found for search query: {qry}'
@@ -144,8 +135,7 @@ class Fixtures(commands.Cog):
         
             m = await processing_update(m, "Processing...")
         
-            async with sl_lock:
-                fx = await self.bot.loop.run_in_executor(None, fsr.fetch_fixtures, self.bot.fixture_driver, '/fixtures')
+            fx = await fsr.get_fixtures(self.bot, '/fixtures')
             fixtures = [str(i) for i in fx]
             embed = await fsr.base_embed
             embed.title = f"≡ Fixtures for {embed.title}" if embed.title else "≡ Fixtures "
@@ -168,9 +158,7 @@ class Fixtures(commands.Cog):
         
             m = await processing_update(m, "Processing...")
         
-            async with sl_lock:
-                results = await self.bot.loop.run_in_executor(None, fsr.fetch_fixtures, self.bot.fixture_driver,
-                                                              '/results')
+            results = await fsr.get_fixtures(self.bot, '/results')
             results = [str(i) for i in results]
             embed = await fsr.base_embed
             embed.title = f"≡ Results for {embed.title}" if embed.title else "≡ Results "
@@ -195,8 +183,7 @@ class Fixtures(commands.Cog):
             m = await processing_update(m, "Processing...")
         
             if isinstance(fsr, football.Team):  # Select from team's leagues.
-                async with sl_lock:
-                    choices = await self.bot.loop.run_in_executor(None, fsr.next_fixture, self.bot.fixture_driver)
+                choices = await fsr.get_next_fixture(self.bot)
                 for_picking = [i.full_league for i in choices]
                 embed = await fsr.base_embed
                 index = await embed_utils.page_selector(ctx, for_picking, deepcopy(embed))
@@ -204,8 +191,7 @@ class Fixtures(commands.Cog):
                     return  # rip
                 fsr = choices[index]
         
-            async with sl_lock:
-                image = await self.bot.loop.run_in_executor(None, fsr.get_table, self.bot.fixture_driver)
+            image = await fsr.table_image(self.bot)
         
             embed = await fsr.base_embed
             if image is None:
@@ -237,8 +223,7 @@ class Fixtures(commands.Cog):
             m = await processing_update(m, "Processing...")
 
             if isinstance(fsr, football.Team):  # Select from team's leagues.
-                async with sl_lock:
-                    choices = await self.bot.loop.run_in_executor(None, fsr.next_fixture, self.bot.fixture_driver)
+                choices = await fsr.get_next_fixture(self.bot)
                 for_picking = [i.full_league for i in choices]
 
                 embed = await fsr.base_embed
@@ -246,10 +231,9 @@ class Fixtures(commands.Cog):
                 if index is None:
                     return  # rip
                 fsr = choices[index]
-                embed = await fsr.base_embed
 
-            async with sl_lock:
-                image = await self.bot.loop.run_in_executor(None, fsr.bracket, self.bot.fixture_driver)
+            image = await fsr.bracket_image(self.bot)
+            embed = await fsr.base_embed
 
             if image is None:  # Provide error instead of
                 embed.description = "No bracket found."
@@ -272,8 +256,7 @@ class Fixtures(commands.Cog):
 
             m = await processing_update(m, "Processing...")
             
-            async with sl_lock:
-                image = await self.bot.loop.run_in_executor(None, game.stats_image, self.bot.fixture_driver)
+            image = await game.match_stats_image(self.bot)
             
             embed = await game.base_embed
             if image is None:
@@ -297,8 +280,7 @@ class Fixtures(commands.Cog):
 
             m = await processing_update(m, "Processing...")
             
-            async with sl_lock:
-                image = await self.bot.loop.run_in_executor(None, game.get_formation, self.bot.fixture_driver)
+            image = await game.formation_image(self.bot)
             embed = await game.base_embed
 
             if image is None:
@@ -322,8 +304,7 @@ class Fixtures(commands.Cog):
 
             m = await processing_update(m, "Processing...")
             
-            async with sl_lock:
-                image = await self.bot.loop.run_in_executor(None, game.summary, self.bot.fixture_driver)
+            image = await game.summary_image(self.bot)
                 
             embed = await game.base_embed
             if image is None:
@@ -351,8 +332,7 @@ class Fixtures(commands.Cog):
             m = await processing_update(m, "Processing...")
             
             if isinstance(fsr, football.Team):  # Select from team's leagues.
-                async with sl_lock:
-                    choices = await self.bot.loop.run_in_executor(None, fsr.next_fixture, self.bot.fixture_driver)
+                choices = await fsr.get_next_fixture(self.bot)
                 for_picking = [i.full_league for i in choices]
                 embed = await fsr.base_embed
                 index = await embed_utils.page_selector(ctx, for_picking, deepcopy(embed))
@@ -360,8 +340,7 @@ class Fixtures(commands.Cog):
                     return  # rip
                 fsr = choices[index]
         
-            async with sl_lock:
-                h2h = await self.bot.loop.run_in_executor(None, fsr.head_to_head, self.bot.fixture_driver)
+            h2h = await self.bot.browsers.run(fsr.head_to_head)
         
             e = await fsr.base_embed
             e.description = f"Head to Head data for {fsr.home} vs {fsr.away}"
@@ -385,8 +364,7 @@ class Fixtures(commands.Cog):
 
             m = await processing_update(m, "Processing...")
             
-            async with sl_lock:
-                players = await self.bot.loop.run_in_executor(None, fsr.players, self.bot.fixture_driver)
+            players = await fsr.get_players(self.bot)
 
             embed = await fsr.base_embed
             players = [f"{i.flag} [{i.name}]({i.link}) ({i.position}): {i.injury}" for i in players if i.injury]
@@ -408,8 +386,7 @@ class Fixtures(commands.Cog):
 
             m = await processing_update(m, "Processing...")
             
-            async with sl_lock:
-                players = await self.bot.loop.run_in_executor(None, fsr.players, self.bot.fixture_driver)
+            players = await fsr.get_players(self.bot)
             srt = sorted(players, key=lambda x: x.number)
             embed = await fsr.base_embed
             embed.title = f"≡ Squad for {embed.title}" if embed.title else "≡ Squad "
@@ -431,22 +408,19 @@ class Fixtures(commands.Cog):
         embed = await fsr.base_embed
         
         if isinstance(fsr, football.Competition):
-            async with sl_lock:
-                sc = await self.bot.loop.run_in_executor(None, fsr.scorers, self.bot.fixture_driver)
+            sc = await fsr.get_scorers(self.bot)
             players = [f"{i.flag} [{i.name}]({i.link}) ({i.team}) {i.goals} Goals, {i.assists} Assists" for i in sc]
 
             embed.title = f"≡ Top Scorers for {embed.title}" if embed.title else "≡ Top Scorers "
         else:
-            async with sl_lock:
-                choices = await self.bot.loop.run_in_executor(None, fsr.player_competitions, self.bot.fixture_driver)
+            choices = await fsr.get_player_competitions(self.bot)
 
             embed.set_author(name="Pick a competition")
             index = await embed_utils.page_selector(ctx, choices, base_embed=embed)
             if index is None:
                 return  # rip
             
-            async with sl_lock:
-                players = await self.bot.loop.run_in_executor(None, fsr.players, self.bot.fixture_driver, index)
+            players = await fsr.get_players(self.bot, tab=index)
             players = sorted([i for i in players if i.goals > 0], key=lambda x: x.goals, reverse=True)
             players = [f"{i.flag} [{i.name}]({i.link}) {i.goals} in {i.apps} appearances" for i in players]
 
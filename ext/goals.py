@@ -1,10 +1,10 @@
 import discord
 from discord.ext import commands
 import asyncio
-import functools
 import typing
 from collections import defaultdict
 from ext.utils import football, embed_utils
+from ext.utils.selenium_driver import BACKGROUND
 
 DEFAULT_LEAGUES = [
     "WORLD: Friendly international",
@@ -28,9 +28,6 @@ DEFAULT_LEAGUES = [
     "USA: MLS"
 ]
 
-# max_concurrency equivalent
-sl_lock = asyncio.Semaphore()
-
 
 async def send_leagues(ctx, channel, leagues):
     e = discord.Embed()
@@ -52,9 +49,7 @@ class Goals(commands.Cog):
         e.title = None
         e.remove_author()
     
-        async with sl_lock:
-            ftp = functools.partial(f.refresh, driver=self.bot.fixture_driver, for_discord=True)
-            await self.bot.loop.run_in_executor(None, ftp)
+        await self.bot.browsers.run(f.refresh, for_discord=True, priority=BACKGROUND)
     
         e.set_footer(text=f"{f.country}: {f.league} | {f.time}")
     
@@ -236,7 +231,7 @@ class Goals(commands.Cog):
             await ctx.reply(f"Searching for {qry}...", delete_after=5, mention_author=False)
             res = await football.fs_search(ctx, qry)
         else:
-            res = football.Competition().by_link(qry, driver=self.bot.fixture_driver)
+            res = await self.bot.browsers.run(football.Competition.by_link, qry)
         
         if res is None:
             return
@@ -3,7 +3,6 @@ import discord
 import asyncio
 from lxml import html
 from ext.utils import transfer_tools
-import datetime
 
 from importlib import reload
 
@@ -22,56 +21,56 @@ class Lookups(commands.Cog):
                 "cat": "players",
                 "func": self._player,
                 "querystr": "Spieler_page",
-                "parser": transfer_tools.parse_players
+                "parser": "players"
             },
             "managers": {
                 "cat": "Managers",
                 "func": self._manager,
                 "querystr": "Trainer_page",
-                "parser": transfer_tools.parse_managers
+                "parser": "managers"
             },
             "clubs": {
                 "cat": "Clubs",
                 "func": self._team,
                 "querystr": "Verein_page",
-                "parser": transfer_tools.parse_clubs
+                "parser": "clubs"
             },
             "referees": {
                 "cat": "referees",
                 "func": self._ref,
                 "querystr": "Schiedsrichter_page",
-                "parser": transfer_tools.parse_refs
+                "parser": "referees"
             },
             "domestic competitions": {
                 "cat": "to competitions",
                 "func": self._cup,
                 "querystr": "Wettbewerb_page",
-                "parser": transfer_tools.parse_leagues
+                "parser": "leagues"
             },
             "international Competitions": {
                 "cat": "International Competitions",
                 "func": self._int,
                 "querystr": "Wettbewerb_page",
-                "parser": transfer_tools.parse_int
+                "parser": "international"
             },
             "agent": {
                 "cat": "Agents",
                 "func": self._agent,
                 "querystr": "page",
-                "parser": transfer_tools.parse_agent
+                "parser": "agents"
             },
             "Transfers": {
                 "cat": "Clubs",
                 "func": self._team,
                 "querystr": "Verein_page",
-                "parser": transfer_tools.parse_clubs,
+                "parser": "clubs",
                 "outfunc": self.get_transfers
             },
             "Rumours": {
                 "cat": "Clubs",
                 "func": self._team,
                 "querystr": "Verein_page",
-                "parser": transfer_tools.parse_clubs,
+                "parser": "clubs",
                 "outfunc": transfer_tools.get_rumours
             }
         }
@@ -188,76 +187,7 @@ class Lookups(commands.Cog):
         await transfer_tools.search(ctx, qry, "Rumours", special=True)
 
     async def get_transfers(self, ctx, e, target):
-        e.description = ""
-        target = target.replace('startseite', 'transfers')
-
-        # Winter window, Summer window.
-        if datetime.datetime.now().month < 7:
-            period = "w"
-            season_id = datetime.datetime.now().year - 1
-        else:
-            period = "s"
-            season_id = datetime.datetime.now().year
-        target = f"{target}/saison_id/{season_id}/pos//detailpos/0/w_s={period}"
-
-        p = {"w_s": period}
-        async with self.bot.session.get(target, params=p) as resp:
-            if resp.status != 200:
-                return await ctx.reply(f"Error {resp.status} connecting to {resp.url}", mention_author=False)
-            tree = html.fromstring(await resp.text())
-
-        e.set_author(name="".join(tree.xpath('.//head/title/text()')), url=target)
-        e.set_footer(text=discord.Embed.Empty)
-        ignore, intable, outtable = tree.xpath('.//div[@class="large-8 columns"]/div[@class="box"]')
-
-        intable = intable.xpath('.//tbody/tr')
-        outtable = outtable.xpath('.//tbody/tr')
-
-        inlist, inloans, outlist, outloans = [], [], [], []
-
-        for i in intable:
-            pname = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()'))
-            player_link = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/@href'))
-
-            player_link = f"http://transfermarkt.co.uk{player_link}"
-            age = "".join(i.xpath('.//td[3]/text()'))
-            ppos = "".join(i.xpath('.//td[2]//tr[2]/td/text()'))
-            try:
-                flag = transfer_tools.get_flag(i.xpath('.//td[4]/img[1]/@title')[0])
-            except IndexError:
-                flag = ""
-            fee = "".join(i.xpath('.//td[6]//text()'))
-            if "loan" in fee.lower():
-                inloans.append(f"{flag} [{pname}]({player_link}) {ppos}, {age}\n")
-                continue
-            inlist.append(f"{flag} [{pname}]({player_link}) {ppos}, {age} ({fee})\n")
-
-        for i in outtable:
-            pname = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()'))
-            player_link = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/@href'))
-            player_link = f"http://transfermarkt.co.uk{player_link}"
-            flag = transfer_tools.get_flag(i.xpath('.//td/img[1]/@title')[1])
-            fee = "".join(i.xpath('.//td[6]//text()'))
-            if "loan" in fee.lower():
-                outloans.append(f"{flag} [{pname}]({player_link}), ")
-                continue
-            outlist.append(f"{flag} [{pname}]({player_link}), ")
-
-        def write_field(title, input_list):
-            output = ""
-            for item in input_list.copy():
-                if len(item) + len(output) < 1009:
-                    output += item
-                    input_list.remove(item)
-                else:
-                    output += f"And {len(input_list)} more..."
-                    break
-            e.add_field(name=title, value=output.strip(","), inline=False)
-
-        for x, y in [("Players in", inlist), ("Loans In", inloans), ("Players out", outlist), ("Loans Out", outloans)]:
-            write_field(x, y) if y else ""
-
-        await ctx.reply(embed=e, mention_author=False)
+        await transfer_tools.get_transfers(ctx, e, target)
 
 
 def setup(bot):
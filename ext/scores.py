@@ -5,22 +5,26 @@ from discord.ext import commands, tasks
 # Misc
 import datetime
 import asyncio
+import hashlib
+import time
 from collections import defaultdict
 import typing
 
 # Databases
 from asyncpg import ForeignKeyViolationError
 
-# Web Scraping
-from lxml import html
-from ext.utils.selenium_driver import spawn_driver
 
 # Utils
 from importlib import reload
-from ext.utils import football, embed_utils
+from ext.utils import football, embed_utils, selenium_driver, html_parser
 from ext.utils.embed_utils import paginate
 
 # Constants.
+LIVE_SCORES_URL = "http://www.flashscore.mobi/"
+EDIT_CONCURRENCY = 20  # Channels edited at once by the score loop.
+LIVE_INTERVAL = 15  # Seconds between polls while games are live or about to kick off.
+IDLE_INTERVAL = 300  # Seconds between polls when nothing is happening.
+KICKOFF_WINDOW = datetime.timedelta(minutes=15)
 NO_GAMES_FOUND = "No games found for your tracked leagues today!" \
                  "\n\nYou can add more leagues with `.tb ls add league_name`" \
                  "\nYou can reset your leagues to the list of default leagues with `.tb ls reset`" \
@@ -65,25 +69,39 @@ class Scores(commands.Cog, name="LiveScores"):
     
     def __init__(self, bot):
         self.bot = bot
-        if self.bot.score_driver is None:
-            self.bot.score_driver = spawn_driver()
         
         # Reload utils
         for i in [football, embed_utils]:
             reload(i)
         # Data
-        if not hasattr(self.bot, "games"):
-            self.bot.games = []
-        self.game_cache = {}  # for fast refresh
-        self.msg_dict = {}
-        self.cache = defaultdict(set)
+        if not hasattr(self.bot, "games") or isinstance(self.bot.games, list):
+            self.bot.games = football.FixtureStore()
+        self.init_state()
         self.bot.loop.create_task(self.update_cache())
         
         # Core loop.
         self.bot.scores = self.score_loop.start()
     
+    def init_state(self):
+        self.game_cache = {}  # for fast refresh
+        self.msg_dict = {}  # channel_id: [messages]
+        self.msg_content = {}  # message_id: last content we sent
+        self.render_cache = {}  # frozenset of leagues: rendered chunks
+        self.render_day = None
+        self.pending_edits = {}  # channel_id: newest chunks not yet sent
+        self.edit_workers = {}  # channel_id: task sending that channel's edits
+        self.edit_semaphore = asyncio.Semaphore(EDIT_CONCURRENCY)
+        self.last_tick = None
+        self.cadence_reason = "Not started"
+        self.page_etag = None
+        self.page_modified = None
+        self.page_hash = None
+        self.cache = defaultdict(set)
+    
     def cog_unload(self):
         self.bot.scores.cancel()
+        for i in self.edit_workers.values():
+            i.cancel()
     
     async def update_cache(self):
         # Grab most recent data.
@@ -115,56 +133,139 @@ class Scores(commands.Cog, name="LiveScores"):
             if r["league"] is not None:
                 self.cache[key].add(r["league"])
 
-    async def update_channel(self, guild_id, channel_id):
-        whitelist = self.cache[(guild_id, channel_id)]
-        # Does league exist in both whitelist and found games.
-        channel_leagues_required = self.game_cache.keys() & whitelist
+    def render(self, leagues: typing.FrozenSet[str]) -> typing.List[str]:
+        """ Render (or fetch cached) message chunks for a set of leagues """
+        # Channels tracking the same leagues share a single render, invalidated per league by the score loop.
+        today = datetime.date.today()
+        if today != self.render_day:
+            self.render_cache.clear()  # Header carries the date.
+            self.render_day = today
+        
+        try:
+            return self.render_cache[leagues]
+        except KeyError:
+            pass
+        
+        # No "time now" in here, unchanged leagues aren't re-rendered or edited so it'd go stale.
+        header = datetime.datetime.now().strftime("Live Scores for **%a %d %b %Y**\n")
+        if not leagues:
+            chunks = [header + NO_GAMES_FOUND]
+            self.render_cache[leagues] = chunks
+            return chunks
         
         chunks = []
-        this_chunk = datetime.datetime.now().strftime("Live Scores for **%a %d %b %Y** (Time Now: **%H:%M** (UTC))\n")
-        if channel_leagues_required:
-            # Build messages.
-            for league in channel_leagues_required:
-                # Chunk-ify to max message length
-                hdr = f"\n**{league}**"
-                if len(this_chunk + hdr) > 1999:
-                    chunks += [this_chunk]
-                    this_chunk = ""
-                this_chunk += hdr + "\n"
-                
-                for game in sorted(self.game_cache[league]):
-                    if len(this_chunk + game) > 1999:
-                        chunks += [this_chunk]
-                        this_chunk = ""
-                    this_chunk += game + "\n"
-        else:
-            this_chunk += NO_GAMES_FOUND
+        parts, size = [header], len(header)
+        for league in leagues:
+            # Chunk-ify to max message length
+            for line in [f"\n**{league}**"] + sorted(self.game_cache[league]):
+                if size + len(line) > 1999:
+                    chunks.append("".join(parts))
+                    parts, size = [], 0
+                parts.append(line + "\n")
+                size += len(line) + 1
         
         # Dump final_chunk.
-        chunks += [this_chunk]
-        
-        # Check if we have some previous messages for this channel
-        if channel_id not in self.msg_dict:
-            self.msg_dict[channel_id] = {}
+        chunks.append("".join(parts))
+        self.render_cache[leagues] = chunks
+        return chunks
+    
+    def invalidate_renders(self, leagues):
+        for key in [k for k in self.render_cache if k & leagues]:
+            del self.render_cache[key]
+    
+    def queue_update(self, guild_id, channel_id) -> asyncio.Task:
+        whitelist = self.cache[(guild_id, channel_id)]
+        # Does league exist in both whitelist and found games.
+        chunks = self.render(frozenset(self.game_cache.keys() & whitelist))
+        
+        # A newer render replaces any edit for this channel that hasn't gone out yet.
+        self.pending_edits[channel_id] = chunks
+        worker = self.edit_workers.get(channel_id)
+        if worker is None or worker.done():
+            worker = self.bot.loop.create_task(self.edit_worker(channel_id))
+            self.edit_workers[channel_id] = worker
+        return worker
+    
+    async def update_channel(self, guild_id, channel_id):
+        await self.queue_update(guild_id, channel_id)
+    
+    async def edit_worker(self, channel_id):
+        # Edits to a channel's messages share that channel's rate limit bucket, so each channel gets a single worker
+        # that sends them in order, while separate channels run side by side up to the semaphore's limit.
+        while channel_id in self.pending_edits:
+            chunks = self.pending_edits.pop(channel_id)
+            async with self.edit_semaphore:
+                try:
+                    await self.apply_chunks(channel_id, chunks)
+                except Exception as e:
+                    print("-- error updating scores channel --", channel_id, e)
+        self.edit_workers.pop(channel_id, None)
+    
+    async def apply_chunks(self, channel_id, chunks):
+        # Check if we have some previous messages for this channel, if not we start from a clean channel.
+        messages = self.msg_dict.get(channel_id)
+        if not messages:
+            return await self.reset_channel(channel_id, chunks)
         
         # Expected behaviour: Edit pre-existing message with new data.
-        if len(self.msg_dict[channel_id]) == len(chunks):
-            for message, chunk in list(zip(self.msg_dict[channel_id], chunks)):
-                # Save API calls by only editing when a change occurs.
-                if message.content != chunk:
-                    try:
-                        await message.edit(content=chunk)
-                    except discord.NotFound:  # reset on corruption.
-                        return await self.reset_channel(channel_id, chunks)
-                    except discord.HTTPException:
-                        pass  # can't help.
+        for message, chunk in list(zip(messages, chunks)):
+            # Save API calls by only editing when a change occurs.
+            if self.msg_content.get(message.id) != chunk:
+                try:
+                    await message.edit(content=chunk)
+                except discord.NotFound:  # reset on corruption.
+                    return await self.reset_channel(channel_id, chunks)
+                except discord.HTTPException:
+                    pass  # can't help.
+                else:
+                    self.msg_content[message.id] = chunk
+        
+        if len(messages) == len(chunks):
+            return
+        
+        # Chunk count changed: append the new chunks, or delete only our surplus messages.
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return
         
-        # Otherwise we build a new message list.
+        if len(chunks) > len(messages):
+            for x in chunks[len(messages):]:
+                try:
+                    message = await channel.send(x)
+                except (discord.Forbidden, discord.NotFound):
+                    break  # These are user-problems, not mine.
+                except discord.HTTPException as e:
+                    print("-- error sending message to scores channel --", channel.id, e)
+                    break
+                messages.append(message)
+                self.msg_content[message.id] = x
         else:
-            await self.reset_channel(channel_id, chunks)
+            surplus = messages[len(chunks):]
+            del messages[len(chunks):]
+            for i in surplus:
+                self.msg_content.pop(i.id, None)
+            await self.delete_messages(channel, surplus)
+        
+        await self.save_messages(channel_id)
+    
+    @staticmethod
+    async def delete_messages(channel, messages):
+        try:
+            await channel.delete_messages(messages)
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            # Bulk delete needs manage_messages. We can always delete our own messages one at a time.
+            for i in messages:
+                try:
+                    await i.delete()
+                except discord.HTTPException:
+                    pass
     
     async def reset_channel(self, channel_id, chunks):
         channel = self.bot.get_channel(channel_id)
+        for i in self.msg_dict.get(channel_id, []):
+            self.msg_content.pop(i.id, None)
         try:
             self.msg_dict[channel_id] = []
             await channel.purge()
@@ -184,13 +285,104 @@ class Scores(commands.Cog, name="LiveScores"):
                 print("-- error sending message to scores channel --", channel.id, e)
             else:
                 self.msg_dict[channel_id].append(message)
+                self.msg_content[message.id] = x
+        
+        await self.save_messages(channel_id)
+    
+    async def save_messages(self, channel_id):
+        # Stored so a restart can edit the existing messages rather than purging and re-sending every channel.
+        rows = [(channel_id, m.id, n) for n, m in enumerate(self.msg_dict.get(channel_id, []))]
+        connection = await self.bot.db.acquire()
+        try:
+            async with connection.transaction():
+                await connection.execute("""DELETE FROM scores_messages WHERE channel_id = $1""", channel_id)
+                await connection.executemany("""
+                    INSERT INTO scores_messages (channel_id, message_id, position)
+                    VALUES ($1, $2, $3)""", rows)
+        except ForeignKeyViolationError:
+            pass  # Channel was removed from the scores database while we were sending.
+        finally:
+            await self.bot.db.release(connection)
+    
+    async def load_messages(self):
+        connection = await self.bot.db.acquire()
+        async with connection.transaction():
+            records = await connection.fetch("""
+            SELECT channel_id, message_id FROM scores_messages ORDER BY channel_id, position""")
+        await self.bot.db.release(connection)
+        
+        known = set(self.msg_dict)
+        for r in records:
+            if r['channel_id'] in known:
+                continue  # A command has already sent fresh messages here.
+            
+            channel = self.bot.get_channel(r['channel_id'])
+            if channel is None:
+                continue
+            
+            # Partial messages can be edited without fetching them first. Their content is unknown, so the first
+            # render after a restart edits each one once, and a NotFound rebuilds only that channel.
+            self.msg_dict.setdefault(r['channel_id'], []).append(channel.get_partial_message(r['message_id']))
     
     # Core Loop
     @tasks.loop(minutes=1)
     async def score_loop(self):
         """ Score Checker Loop """
+        start = time.monotonic()
+        updated = await self.tick()
+        self.last_tick = time.monotonic() - start
+        if self.last_tick > self.interval:
+            print(f'{datetime.datetime.utcnow()} | Scores tick took {self.last_tick:.1f}s '
+                  f'({updated} channels updated)')
+        
+        # Poll faster while games are live or about to kick off, back off when nothing is happening.
+        interval, self.cadence_reason = self.pick_cadence()
+        if interval != self.interval:
+            self.score_loop.change_interval(seconds=interval)
+    
+    @property
+    def interval(self) -> float:
+        return self.score_loop.hours * 3600 + self.score_loop.minutes * 60 + self.score_loop.seconds
+    
+    def pick_cadence(self) -> typing.Tuple[int, str]:
+        now = datetime.datetime.now()
+        next_kickoff = None
+        # Only leagues some channel is tracking count, bot.games holds every fixture on the page.
+        tracked = set().union(*self.cache.values())
+        for i in [g for league in tracked for g in self.bot.games.league(league)]:
+            if i.state in ["live", "ht"]:
+                return LIVE_INTERVAL, f"{i.home} vs {i.away} is live"
+            
+            if i.state != "sched":
+                continue
+            
+            try:
+                kickoff = datetime.datetime.combine(now.date(), datetime.datetime.strptime(i.time, "%H:%M").time())
+            except (TypeError, ValueError):
+                continue
+            
+            # Late kickoffs still count as imminent until the page says otherwise.
+            if now - KICKOFF_WINDOW <= kickoff <= now + KICKOFF_WINDOW:
+                return LIVE_INTERVAL, f"{i.home} vs {i.away} kicks off at {i.time}"
+            
+            if kickoff > now and (next_kickoff is None or kickoff < next_kickoff):
+                next_kickoff = kickoff
+        
+        if next_kickoff is not None:
+            return IDLE_INTERVAL, f"No tracked live games, next kickoff at {next_kickoff.strftime('%H:%M')}"
+        return IDLE_INTERVAL, "No tracked live or upcoming games"
+    
+    async def tick(self) -> int:
+        """ Fetch, merge and push one round of scores, returns the number of channels updated. """
         games = await self.fetch_games(self.bot.games)
+        if games is None:
+            return 0  # Page unchanged since last tick.
         
+        changed = self.merge_games(games)
+        return await self.push_updates(changed)
+    
+    def merge_games(self, games) -> typing.Set[str]:
+        """ Merge a round of fetched games into bot.games, returns the leagues whose live scores changed. """
         # Purging of "expired" games.
         target_day = datetime.datetime.now() + datetime.timedelta(hours=1)
         target_day = target_day.date()
@@ -198,168 +390,123 @@ class Scores(commands.Cog, name="LiveScores"):
         games = [i for i in games if i.date >= target_day]
         
         # If we have an item with new data, force a full cache clear. This is expected behaviour at midnight.
-        if not {i.url for i in self.bot.games} & {x.url for x in games}:
-            self.bot.games = []
+        if not any(i.url in self.bot.games for i in games):
+            self.bot.games.clear()
             
-        # If we only have a partial match returned, for whatever reason
-        self.bot.games = [i for i in self.bot.games if i.url not in [x.url for x in games]] + [x for x in games]
+        # If we only have a partial match returned, for whatever reason, keep the games we didn't see.
+        for i in games:
+            self.bot.games.upsert(i)
+        self.bot.games.expire(target_day)
         
         # Key games by league for intersections.
         game_dict = defaultdict(set)
-        for i in self.bot.games:
-            game_dict[i.full_league].add(i.live_score_text)
-        self.game_cache = game_dict
+        for league in self.bot.games.leagues:
+            game_dict[league] = {i.live_score_text for i in self.bot.games.league(league)}
         
-        # Iterate: Check vs each server's individual config settings
-        for i in self.cache.copy():  # Error if dict changes sizes during iteration.
-            await self.update_channel(i[0], i[1])
+        # Diff against last tick so we only re-render channels that track a league that changed.
+        changed = {i for i in game_dict.keys() | self.game_cache.keys() if game_dict.get(i) != self.game_cache.get(i)}
+        self.game_cache = game_dict
+        self.invalidate_renders(changed)
+        return changed
+    
+    def channels_to_update(self, changed) -> typing.List[typing.Tuple[int, int]]:
+        # Check vs each server's individual config settings
+        targets = []
+        for (guild_id, channel_id), whitelist in self.cache.copy().items():  # Error if dict changes size.
+            if channel_id in self.msg_dict and not whitelist & changed:
+                continue  # Nothing new to show, and we already have messages up.
+            targets.append((guild_id, channel_id))
+        return targets
+    
+    async def push_updates(self, changed) -> int:
+        workers = {self.queue_update(guild_id, channel_id) for guild_id, channel_id in self.channels_to_update(changed)}
+        if workers:
+            await asyncio.wait(workers)
+        return len(workers)
     
     @score_loop.before_loop
     async def before_score_loop(self):
         await self.bot.wait_until_ready()
         await self.update_cache()
+        await self.load_messages()
     
-    async def fetch_games(self, games):
-        async with self.bot.session.get("http://www.flashscore.mobi/") as resp:
+    async def fetch_games(self, games: football.FixtureStore) -> typing.Optional[typing.List[football.LiveFixture]]:
+        """ Returns None if the page has not changed since the last tick, or could not be parsed. """
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        if self.page_etag is not None:
+            headers["If-None-Match"] = self.page_etag
+        if self.page_modified is not None:
+            headers["If-Modified-Since"] = self.page_modified
+        
+        async with self.bot.session.get(LIVE_SCORES_URL, headers=headers) as resp:
+            if resp.status == 304:
+                return None
             if resp.status != 200:
                 print(f'{datetime.datetime.utcnow()} | Scores error {resp.status} ({resp.reason})')
-            src = await resp.text()
-            xml = bytes(bytearray(src, encoding='utf-8'))
-        tree = html.fromstring(xml)
-        elements = tree.xpath('.//div[@id="score-data"]/* | .//div[@id="score-data"]/text()')
-        
-        date = datetime.datetime.today().date()
-        country = None
-        league = None
-        home_cards = ""
-        away_cards = ""
-        score_home = None
-        score_away = None
-        url = None
-        time = None
-        state = None
-        capture_group = []
-        new_games = []
+            else:
+                self.page_etag = resp.headers.get("ETag")
+                self.page_modified = resp.headers.get("Last-Modified")
+            src = await resp.read()
         
-        for i in elements:
-            try:
-                tag = i.tag
-            except AttributeError:
-                # Not an element. / lxml.etree._ElementUnicodeResult
-                capture_group.append(i)
+        # Skip parsing and diffing entirely if nothing changed.
+        page_hash = hashlib.sha1(src).digest()
+        if page_hash == self.page_hash:
+            return None
+        
+        try:
+            rows = await html_parser.parse("live_scores", src)
+        except Exception as e:
+            # A dead parse worker or a bad page must not stop the loop, leave the hash unset so we retry it next tick.
+            print(f'{datetime.datetime.utcnow()} | Scores parse failed: {e!r}')
+            return None
+        self.page_hash = page_hash
+        return self.update_games(rows, games)
+    
+    def parse_games(self, src: bytes, games: football.FixtureStore) -> typing.List[football.LiveFixture]:
+        """ Parse the flashscore.mobi page right here, fetch_games does the same in the parse pool. """
+        return self.update_games(html_parser.extract("live_scores", src), games)
+    
+    def update_games(self, rows: typing.List[dict], games: football.FixtureStore) -> typing.List[football.LiveFixture]:
+        """ Turn parsed rows into fixtures, updating known games in place and dispatching their events. """
+        new_games = []
+        for row in rows:
+            # If we are refreshing, create a new object and append it.
+            fx = games.get(row["url"])
+            if fx is None:
+                new_games.append(football.LiveFixture(**row))
                 continue
             
-            if tag == "h4":
-                country, league = i.text.split(': ')
-                league = league.split(' - ')[0]
+            # Otherwise, update the existing one and spool out notifications.
+            old_score_home = fx.score_home
+            old_score_away = fx.score_away
+            old_cards_home = fx.home_cards
+            old_cards_away = fx.away_cards
+            old_state = fx.state
             
-            elif tag == "span":
-                # Sub-span containing postponed data.
-                time = i.find('span').text if i.find('span') is not None else i.text
-                
-                # Timezone Correction
-                try:
-                    time = datetime.datetime.strptime(time, "%H:%M") - datetime.timedelta(hours=1)
-                    time = datetime.datetime.strftime(time, "%H:%M")
-                    hour, minute = time.split(':')
-                    now = datetime.datetime.now()
-                    date = now.replace(hour=int(hour), minute=int(minute))
-                    date = date - datetime.timedelta(hours=1)
-                    date = date.date()
-                except ValueError:
-                    # Handle live games, cancelled, postponed, properly.
-                    pass
-                
-                # Is the match finished?
-                try:
-                    state = i.find('span').text
-                except AttributeError:
-                    pass
+            fx.time = row["time"]
+            fx.state = row["state"]
+            fx.score_home = row["score_home"]
+            fx.score_away = row["score_away"]
+            fx.home_cards = row["home_cards"]
+            fx.away_cards = row["away_cards"]
             
-            elif tag == "a":
-                url = i.attrib['href']
-                url = url.split('/?')[0].strip('/')  # Trim weird shit that causes duplicates.
-                url = "http://www.flashscore.com/" + url
-                score_home, score_away = i.text.split(':')
-                if not state:
-                    state = i.attrib['class']
-                if score_away.endswith('aet'):
-                    score_away = score_away.replace('aet', "").strip()
-                    time = "AET"
-                elif score_away.endswith('pen'):
-                    score_away = score_away.replace('pen', "").strip()
-                    time = "After Pens"
-                
-                try:
-                    score_home = int(score_home)
-                    score_away = int(score_away)
-                except ValueError:
-                    score_home, score_away = 0, 0
+            if fx.score_home > 0 or fx.score_away > 0:
+                if old_score_home < fx.score_home:
+                    self.bot.dispatch("fixture_event", "goal", fx)
+                if old_score_away < fx.score_away:
+                    self.bot.dispatch("fixture_event", "goal", fx, home=False)
+            if old_cards_home != fx.home_cards:
+                self.bot.dispatch("fixture_event", "dismissal", fx)
+            if old_cards_away != fx.away_cards:
+                self.bot.dispatch("fixture_event", "dismissal", fx, home=False)
             
-            elif tag == "img":  # Red Cards
-                if "rcard" in i.attrib['class']:
-                    cards = "`" + "🟥" * int("".join([i for i in i.attrib['class'] if i.isdigit()])) + "`"
-                    if " - " in "".join(capture_group):
-                        away_cards = cards
-                    else:
-                        home_cards = cards
-                else:
-                    print("Live scores loop / Unhandled class for ", i.home, "vs", i.away, i.attrib['class'])
+            # Cached tables & match screenshots for this league are stale now.
+            if (old_score_home, old_score_away) != (fx.score_home, fx.score_away) or \
+                    (fx.state == "fin" and old_state != "fin"):
+                selenium_driver.image_cache.invalidate(fx.full_league, fx.url)
+                selenium_driver.page_cache.invalidate(fx.full_league)
             
-            elif tag == "br":
-                # End of match row.
-                try:
-                    home, away = "".join(capture_group).split(' - ', 1)  # Olympia HK can suck my fucking cock
-                except ValueError:
-                    print("fetch_games Value error", capture_group)
-                    continue
-                home = home.strip()
-                away = away.strip()
-
-                # DEBUG
-                if time == "Half Time":
-                    state = "ht"
-                
-                # If we are refreshing, create a new object and append it.
-                if url not in [fx.url for fx in games]:
-                    fixture = football.Fixture(time=time, home=home, away=away, url=url, country=country,
-                                               league=league,
-                                               score_home=score_home, score_away=score_away, away_cards=away_cards,
-                                               home_cards=home_cards, state=state, date=date)
-                    new_games.append(fixture)
-                
-                # Otherwise, update the existing one and spool out notifications.
-                else:
-                    fx = [f for f in games if url == f.url][0]
-                    old_score_home = fx.score_home
-                    old_score_away = fx.score_away
-                    old_cards_home = fx.home_cards
-                    old_cards_away = fx.away_cards
-                    
-                    fx.time = time
-                    fx.state = state
-                    fx.score_home = score_home
-                    fx.score_away = score_away
-                    fx.home_cards = home_cards
-                    fx.away_cards = away_cards
-                    
-                    if score_home > 0 or score_away > 0:
-                        if old_score_home < fx.score_home:
-                            self.bot.dispatch("fixture_event", "goal", fx)
-                        if old_score_away < fx.score_away:
-                            self.bot.dispatch("fixture_event", "goal", fx, home=False)
-                    if old_cards_home != fx.home_cards:
-                        self.bot.dispatch("fixture_event", "dismissal", fx)
-                    if old_cards_away != fx.away_cards:
-                        self.bot.dispatch("fixture_event", "dismissal", fx, home=False)
-                
-                    new_games.append(fx)
-                
-                # Clear attributes
-                home_cards = ""
-                away_cards = ""
-                state = None
-                capture_group = []
+            new_games.append(fx)
         return new_games
     
     async def _pick_channels(self, ctx, channels):
@@ -471,8 +618,8 @@ class Scores(commands.Cog, name="LiveScores"):
         
         await self.bot.db.release(connection)
         await ctx.reply(f"The {ch.mention} channel was created successfully.", mention_author=False)
-        await self.update_channel(ch.guild.id, ch.id)
         await self.update_cache()
+        await self.update_channel(ch.guild.id, ch.id)
     
     @commands.has_permissions(manage_channels=True)
     @ls.command(usage="[#channel #channel2] <search query or flashscore link>")
@@ -496,7 +643,7 @@ class Scores(commands.Cog, name="LiveScores"):
             if "flashscore" not in qry:
                 return await ctx.reply('🚫 Invalid link provided', mention_author=True)
             try:
-                res = football.Competition().by_link(qry, driver=self.bot.fixture_driver)
+                res = await self.bot.browsers.run(football.Competition.by_link, qry)
             except IndexError:
                 return await ctx.reply('🚫 Invalid link provided', mention_author=True)
             
@@ -529,6 +676,8 @@ class Scores(commands.Cog, name="LiveScores"):
                 else:
                     await ctx.reply(f"✅ **{res}** added to the tracked leagues for {c.mention}", mention_author=False)
                     await send_leagues(ctx, c, leagues)
+                    # Render with the new whitelist now, later ticks skip channels whose leagues haven't changed.
+                    self.cache[(c.guild.id, c.id)] = leagues
                     await self.update_channel(c.guild.id, c.id)
             await self.bot.db.release(connection)
 
@@ -574,10 +723,23 @@ class Scores(commands.Cog, name="LiveScores"):
             leagues.remove(target)
             
             await ctx.reply(f"✅ **{target}** deleted from the tracked leagues for {c.mention}", mention_author=False)
+            self.cache[(c.guild.id, c.id)] = leagues  # As in add, so this render drops the league.
             await self.update_channel(c.guild.id, c.id)
             await send_leagues(ctx, c, leagues)
         await self.update_cache()
     
+    @ls.command(hidden=True)
+    @commands.is_owner()
+    async def cadence(self, ctx):
+        """ Show how often the live scores loop is polling, and why. """
+        e = discord.Embed(color=0x2ecc71)
+        e.title = "Live Scores polling"
+        e.add_field(name="Interval", value=f"{self.interval:.0f} seconds")
+        e.add_field(name="Last tick", value="n/a" if self.last_tick is None else f"{self.last_tick:.2f} seconds")
+        e.add_field(name="Tracked games", value=str(len(self.bot.games)))
+        e.description = self.cadence_reason
+        await ctx.reply(embed=e, mention_author=False)
+    
     @ls.command(usage="<channel_id>", hidden=True)
     @commands.is_owner()
     async def admin(self, ctx, channel_id: int):
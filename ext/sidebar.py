@@ -1,6 +1,5 @@
-import functools
-
 from ext.utils import football
+from ext.utils.selenium_driver import BACKGROUND
 from importlib import reload
 from discord.ext import commands, tasks
 from PIL import Image
@@ -119,7 +118,7 @@ class NUFCSidebar(commands.Cog):
         return f"\n\n### {pre} - {match} - {post}"
     
     async def table(self, qry):
-        async with self.bot.session.get('http://www.bbc.co.uk/sport/football/premier-league/table') as resp:
+        async with self.bot.session.cached('http://www.bbc.co.uk/sport/football/premier-league/table') as resp:
             if resp.status != 200:
                 return "Retry"
             tree = html.fromstring(await resp.text())
@@ -164,11 +163,10 @@ class NUFCSidebar(commands.Cog):
         # Fetch all data
         top = await self.bot.loop.run_in_executor(None, self.get_wiki, "NUFC")
 
-        fsr = await self.bot.loop.run_in_executor(None, functools.partial(football.Team.by_id, team_id,
-                                                                          driver=self.bot.fixture_driver))
+        fsr = await self.bot.browsers.run(football.Team.by_id, team_id, priority=BACKGROUND)
             
-        fixtures = await self.bot.loop.run_in_executor(None, fsr.fetch_fixtures, self.bot.fixture_driver, "/fixtures")
-        results = await self.bot.loop.run_in_executor(None, fsr.fetch_fixtures, self.bot.fixture_driver, "/results")
+        fixtures = await fsr.get_fixtures(self.bot, "/fixtures", priority=BACKGROUND)
+        results = await fsr.get_fixtures(self.bot, "/results", priority=BACKGROUND)
         table = await self.table(qry)
 
         # Get match threads
@@ -202,7 +200,7 @@ class NUFCSidebar(commands.Cog):
         # CHeck if we need to upload a temporary badge.
         if not lm.home_icon or not lm.away_icon:
             which_team = "home" if not lm.home_icon else "away"
-            badge = await self.bot.loop.run_in_executor(None, lm.get_badge, self.bot.fixture_driver, which_team)
+            badge = await self.bot.browsers.run(lm.get_badge, team=which_team, priority=BACKGROUND)
             im = Image.open(badge)
             im.save("TEMP_BADGE.png", "PNG")
             await self.bot.loop.run_in_executor(None, self.upload_image, "TEMP_BADGE.png", "temp", "Upload a badge")
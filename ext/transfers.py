@@ -1,8 +1,7 @@
-from ext.utils import transfer_tools, embed_utils
+from ext.utils import transfer_tools, embed_utils, html_parser
 from discord.ext import commands, tasks
 from collections import defaultdict
 from importlib import reload
-from lxml import html
 import typing
 import discord
 
@@ -84,12 +83,19 @@ class Transfers(commands.Cog):
         async with self.bot.session.get(src + flags) as resp:
             if resp.status != 200:
                 return
-            tree = html.fromstring(await resp.text())
+            page = await resp.text()
+        
+        try:
+            rows = await html_parser.parse("transfer_ticker", page)
+        except Exception as e:
+            # Don't let a dead parse worker stop the loop, we'll get the page again next time round.
+            print("-- error parsing transfer ticker --", e)
+            return
         
         skip_output = True if not self.parsed else False
         # skip_output = False   
-        for i in tree.xpath('.//div[@class="responsive-table"]/div/table/tbody/tr'):
-            player_name = "".join(i.xpath('.//td[1]//tr[1]/td[2]/a/text()')).strip()
+        for row in rows:
+            player_name = row["player_name"]
             
             # DEBUG_RESTART
             # if "Hashimoto" in player_name:
@@ -104,77 +110,27 @@ class Transfers(commands.Cog):
             if skip_output:
                 continue
             
-            # Player Info
-            player_link = "".join(i.xpath('.//td[1]//tr[1]/td[2]/a/@href'))
-            age = "".join(i.xpath('./td[2]//text()')).strip()
-            pos = "".join(i.xpath('./td[1]//tr[2]/td/text()'))
-            nat = i.xpath('.//td[3]/img/@title')
-            flags = []
-            for j in nat:
-                flags.append(transfer_tools.get_flag(j))
-            # nationality = ", ".join([f'{j[0]} {j[1]}' for j in list(zip(flags,nat))])
-            nationality = "".join(flags)
-            
-            # Leagues & Fee
-            new_team = "".join(i.xpath('.//td[5]/table//tr[1]/td/a/text()')).strip()
-            new_team_link = "".join(i.xpath('.//td[5]/table//tr[1]/td/a/@href')).strip()
-            new_league = "".join(i.xpath('.//td[5]/table//tr[2]/td/a/text()')).strip()
-            new_league_link = "".join(i.xpath('.//td[5]/table//tr[2]/td/a/@href')).strip()
-            new_league_flag = transfer_tools.get_flag("".join(i.xpath('.//td[5]/table//tr[2]/td//img/@alt')))
-            
-            old_team = "".join(i.xpath('.//td[4]/table//tr[1]/td/a/text()')).strip()
-            old_team_link = "".join(i.xpath('.//td[4]/table//tr[1]/td/a/@href')).strip()
-            old_league = "".join(i.xpath('.//td[4]/table//tr[2]/td/a/text()')).strip()
-            old_league_link = "".join(i.xpath('.//td[4]/table//tr[2]/td/a/@href')).strip()
-            old_league_flag = transfer_tools.get_flag("".join(i.xpath('.//td[4]/table//tr[2]/td//img/@alt')))
-            
-            # Fix Links
-            if "transfermarkt" not in new_team_link:
-                new_team_link = "https://www.transfermarkt.co.uk" + new_team_link if new_team_link else ""
-            if "transfermarkt" not in new_league_link:
-                new_league_link = f"https://www.transfermarkt.co.uk" + new_league_link if new_league_link else ""
-            if "transfermarkt" not in old_team_link:
-                old_team_link = "https://www.transfermarkt.co.uk" + old_team_link if old_team_link else ""
-            if "transfermarkt" not in old_league_link:
-                old_league_link = "https://www.transfermarkt.co.uk" + old_league_link if old_league_link else ""
-            
-            # Markdown.
-            new_league_markdown = "" if "None" in new_league else f"{new_league_flag} [{new_league}]({new_league_link})"
-            new_team_markdown = f"[{new_team}]({new_team_link})"
-            old_league_markdown = "" if "None" in old_league else f"{old_league_flag} [{old_league}]({old_league_link})"
-            old_team_markdown = f"[{old_team}]({old_team_link})"
-            
-            if new_league == old_league:
-                move = f"{old_team} to {new_team} ({new_league_flag} {new_league})"
-            else:
-                move = f"{old_team} ({old_league_flag} {old_league}) to {new_team} ({new_league_flag} {new_league})"
-            
-            move_info = move.replace(" (None )", "")
-            
-            fee = "".join(i.xpath('.//td[6]//a/text()'))
-            fee_link = "https://www.transfermarkt.co.uk" + "".join(i.xpath('.//td[6]//a/@href'))
-            fee_markdown = f"[{fee}]({fee_link})"
-            
             e = discord.Embed()
             e.description = ""
             e.colour = 0x1a3151
-            e.title = f"{nationality} {player_name} | {age}"
-            e.url = f"https://www.transfermarkt.co.uk{player_link}"
+            e.title = f"{row['nationality']} {player_name} | {row['age']}"
+            e.url = f"https://www.transfermarkt.co.uk{row['player_link']}"
             
-            e.description = f"{pos}\n"
-            e.description += f"**To**: {new_team_markdown} {new_league_markdown}\n"
-            e.description += f"**From**: {old_team_markdown} {old_league_markdown}"
+            e.description = f"{row['pos']}\n"
+            e.description += f"**To**: {row['new_team_markdown']} {row['new_league_markdown']}\n"
+            e.description += f"**From**: {row['old_team_markdown']} {row['old_league_markdown']}"
             
-            if fee:
-                e.add_field(name="Reported Fee", value=fee_markdown, inline=False)
+            if row["fee"]:
+                e.add_field(name="Reported Fee", value=row["fee_markdown"], inline=False)
             
             # Get picture and re-host on imgur.
-            th = "".join(i.xpath('.//td[1]//tr[1]/td[1]/img/@src'))
-            th = await self.imgurify(th)
+            th = await self.imgurify(row["thumbnail"])
             if th is not None:
                 e.set_thumbnail(url=th)
             
-            shortstring = f"{player_name} | {fee} | <{fee_link}>\n{move_info}"
+            shortstring = f"{player_name} | {row['fee']} | <{row['fee_link']}>\n{row['move_info']}"
+            new_team_link, new_league_link = row["new_team_link"], row["new_league_link"]
+            old_team_link, old_league_link = row["old_team_link"], row["old_league_link"]
             for (guild_id, channel_id, mode), whitelist in self.cache.copy().items():
                 ch = self.bot.get_channel(channel_id)
                 if ch is None:
@@ -3,9 +3,8 @@ from discord.ext import commands
 import datetime
 
 import json
-from lxml import html
 
-from ext.utils import embed_utils
+from ext.utils import embed_utils, html_parser
 
 
 class Tv(commands.Cog):
@@ -46,62 +45,12 @@ class Tv(commands.Cog):
 				em.url = "http://www.livesoccertv.com/schedules/"
 				em.title = f"Today's Televised Matches"		
 
-			tvlist = []
-			async with self.bot.session.get(em.url) as resp:
+			async with self.bot.session.cached(em.url) as resp:
 				if resp.status != 200:
 					return await ctx.reply(f"🚫 <{em.url}> returned a HTTP {resp.status} error.", mention_author=False)
-				tree = html.fromstring(await resp.text())
-				
-				match_column = 3 if not team else 5
-				
-				for i in tree.xpath(".//table[@class='schedules'][1]//tr"):
-					# Discard finished games.
-					complete = "".join(i.xpath('.//td[@class="livecell"]//span/@class')).strip()
-					if complete in ["narrow ft", "narrow repeat"]:
-						continue
-					
-					match = "".join(i.xpath(f'.//td[{match_column}]//text()')).strip()
-					if not match:
-						continue
-					ml = i.xpath(f'.//td[{match_column + 1}]//text()')
-					
-					try:
-						link = i.xpath(f'.//td[{match_column + 1}]//a/@href')[-1]
-						link = f"http://www.livesoccertv.com/{link}"
-					except IndexError:
-						link = ""
-					
-					ml = ", ".join([x.strip() for x in ml if x != "nufcTV" and x.strip() != ""])
-					
-					if not ml:
-						continue
-					
-					date = "".join(i.xpath('.//td[@class="datecell"]//span/text()')).strip()
-					time = "".join(i.xpath('.//td[@class="timecell"]//span/text()')).strip()
-					
-					if complete != "narrow live":
-						# Correct TimeZone offset.
-						try:
-							time = datetime.datetime.strptime(time, '%H:%M') + datetime.timedelta(hours=5)
-							time = datetime.datetime.strftime(time, '%H:%M')
-							dt = f"{date} {time}"
-						except ValueError as e:
-							print("ValueError in tv", e)
-							dt = ""
-								
-					elif not team:
-						dt = i.xpath('.//td[@class="timecell"]//span/text()')[-1].strip()
-						if dt == "FT":
-							continue
-						if dt != "HT" and ":" not in dt:
-							dt = f"LIVE {dt}'"
-					else:
-						if date == datetime.datetime.now().strftime("%b %d"):
-							dt = time
-						else:
-							dt = date
-					
-					tvlist.append(f'`{dt}` [{match}]({link})')
+				src = await resp.text()
+			
+			tvlist = await html_parser.parse("tv_schedule", src, bool(team))
 			
 			if not tvlist:
 				return await ctx.reply(f"No televised matches found, check online at {em.url}", mention_author=False)
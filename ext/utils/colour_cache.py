@@ -0,0 +1,145 @@
+""" Dominant colours of logos & badges for embeds, cached in memory and in the database. """
+import asyncio
+import typing
+from io import BytesIO
+
+import aiohttp
+from asyncpg import InterfaceError, PostgresError
+from PIL import Image, UnidentifiedImageError
+
+from ext.utils import http_client
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Falls back to ColorThief on the thumbnail.
+    from colorthief import ColorThief
+
+BLURPLE = 0x7289da
+THUMBNAIL = (64, 64)
+DB_ERRORS = (PostgresError, InterfaceError, OSError)
+
+
+def dominant_colour(data: bytes) -> int:
+    """ Most common colour of an image as an int, ignoring transparent & near white pixels """
+    with Image.open(BytesIO(data)) as im:
+        im = im.convert("RGBA")
+        im.thumbnail(THUMBNAIL)
+
+        if numpy is None:
+            output = BytesIO()
+            im.save(output, "PNG")
+            r, g, b = ColorThief(output).get_color(quality=1)
+            return r << 16 | g << 8 | b
+
+        pixels = numpy.asarray(im).reshape(-1, 4).astype(numpy.int32)
+
+    # Same pixels ColorThief skips: mostly transparent or almost white.
+    pixels = pixels[(pixels[:, 3] >= 125) & ~numpy.all(pixels[:, :3] > 250, axis=1)][:, :3]
+    if not len(pixels):
+        return BLURPLE
+
+    # Bucket into 32 levels per channel, then average the real colours in the busiest bucket.
+    buckets = (pixels[:, 0] >> 3) << 10 | (pixels[:, 1] >> 3) << 5 | pixels[:, 2] >> 3
+    busiest = numpy.bincount(buckets).argmax()
+    r, g, b = pixels[buckets == busiest].mean(axis=0).astype(int)
+    return int(r) << 16 | int(g) << 8 | int(b)
+
+
+class ColourService:
+    """ Image url -> embed colour, each logo is only downloaded & decoded once. """
+    def __init__(self):
+        self.db = None
+        self.session = None
+        self.colours = {}
+        self.inflight = {}
+        self.loaded = False
+
+    def attach(self, db, session):
+        self.db = db
+        self.session = session
+
+    async def load(self):
+        self.loaded = True
+        if self.db is None:
+            return
+        try:
+            connection = await self.db.acquire()
+        except DB_ERRORS as err:
+            return print(f"Unable to load embed colours: {err}")
+        try:
+            records = await connection.fetch(""" SELECT url, colour FROM embed_colours """)
+        except DB_ERRORS as err:
+            return print(f"Unable to load embed colours: {err}")
+        finally:
+            await self.db.release(connection)
+        for r in records:
+            self.colours.setdefault(r["url"], r["colour"])
+
+    async def save(self, url, colour):
+        if self.db is None:
+            return
+        # Colours are still cached in memory if this fails, it'll be worked out again after a restart.
+        try:
+            connection = await self.db.acquire()
+        except DB_ERRORS as err:
+            return print(f"Unable to save embed colour for {url}: {err}")
+        try:
+            async with connection.transaction():
+                await connection.execute(""" INSERT INTO embed_colours (url, colour) VALUES ($1, $2)
+                                             ON CONFLICT (url) DO UPDATE SET colour = EXCLUDED.colour """, url, colour)
+        except DB_ERRORS as err:
+            print(f"Unable to save embed colour for {url}: {err}")
+        finally:
+            await self.db.release(connection)
+
+    async def get(self, url) -> int:
+        if not self.loaded:
+            await self.load()
+
+        try:
+            return self.colours[url]
+        except KeyError:
+            pass
+
+        future = self.inflight.get(url)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self.inflight[url] = asyncio.get_event_loop().create_future()
+        try:
+            colour = await self.compute(url)
+        except Exception as err:
+            future.set_exception(err)
+            future.exception()  # Mark as retrieved, in case nobody else was waiting on it.
+            raise
+        else:
+            future.set_result(BLURPLE if colour is None else colour)
+        finally:
+            del self.inflight[url]
+
+        if colour is None:
+            return BLURPLE  # Download or decode failed, try again next time.
+        self.colours[url] = colour
+        await self.save(url, colour)
+        return colour
+
+    async def compute(self, url) -> typing.Optional[int]:
+        """ None if the image couldn't be downloaded or decoded, so nothing gets stored for it """
+        session = self.session or http_client.get_client()
+        try:
+            async with session.get(url) as resp:
+                if resp.status != 200:
+                    return None
+                data = await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None
+
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(None, dominant_colour, data)
+        except (UnidentifiedImageError, OSError, ValueError):
+            return None  # An error page or a truncated download, it may be fine next time.
+
+
+service = ColourService()
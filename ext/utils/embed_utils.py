@@ -1,14 +1,12 @@
 import asyncio
 from copy import deepcopy
-from io import BytesIO
 
-import aiohttp
 import discord
 import typing
-from PIL import UnidentifiedImageError
-from colorthief import ColorThief
 import datetime
 
+from ext.utils import colour_cache
+
 # Constant, used for footers.
 PAGINATION_FOOTER_ICON = "http://pix.iemoji.com/twit33/0056.png"
 
@@ -38,17 +36,7 @@ async def embed_image(ctx, base_embed, image, filename=None):
 async def get_colour(url=None):
     if url is None or url == discord.Embed.Empty:
         return discord.Colour.blurple()
-    async with aiohttp.ClientSession() as cs:
-        async with cs.get(url) as resp:
-            r = await resp.read()
-            f = BytesIO(r)
-            try:
-                loop = asyncio.get_event_loop()
-                c = await loop.run_in_executor(None, ColorThief(f).get_color)
-                # Convert to base 16 int.
-                return int('%02x%02x%02x' % c, 16)
-            except UnidentifiedImageError:
-                return discord.Colour.blurple()
+    return await colour_cache.service.get(str(url))
 
 
 def rows_to_embeds(base_embed, rows, per_row=10, description_top="") -> typing.List[discord.Embed]:
@@ -0,0 +1,542 @@
+""" Everything the parse pool runs. Kept apart from the cogs & football utils so workers only import lxml & pycountry,
+never discord or the browsers. """
+import datetime
+import typing
+
+from ext.utils import html_parser
+from ext.utils.flags import get_flag
+
+
+# flashscore.mobi live scores
+SCORE_DATA = './/div[@id="score-data"]'
+
+
+def score_data(tree):
+    """ Elements & text of the score-data div in page order, walked directly because libxml2's sort of the
+    equivalent "* | text()" union is quadratic in the number of text nodes. """
+    for div in html_parser.xpath(SCORE_DATA)(tree):
+        if div.text:
+            yield div.text
+        for child in div:
+            yield child
+            if child.tail:
+                yield child.tail
+
+
+@html_parser.extractor("live_scores")
+def live_scores(tree) -> typing.List[dict]:
+    """ Every game on the flashscore.mobi page, as LiveFixture kwargs """
+    date = datetime.datetime.today().date()
+    country = None
+    league = None
+    home_cards = ""
+    away_cards = ""
+    score_home = None
+    score_away = None
+    url = None
+    time = None
+    state = None
+    capture_group = []
+    rows = []
+    
+    for i in score_data(tree):
+        try:
+            tag = i.tag
+        except AttributeError:
+            # Not an element, text between them.
+            capture_group.append(i)
+            continue
+        
+        if tag == "h4":
+            country, league = i.text.split(': ')
+            league = league.split(' - ')[0]
+        
+        elif tag == "span":
+            # Sub-span containing postponed data.
+            time = i.find('span').text if i.find('span') is not None else i.text
+            
+            # Timezone Correction
+            try:
+                time = datetime.datetime.strptime(time, "%H:%M") - datetime.timedelta(hours=1)
+                time = datetime.datetime.strftime(time, "%H:%M")
+                hour, minute = time.split(':')
+                now = datetime.datetime.now()
+                date = now.replace(hour=int(hour), minute=int(minute))
+                date = date - datetime.timedelta(hours=1)
+                date = date.date()
+            except ValueError:
+                # Handle live games, cancelled, postponed, properly.
+                pass
+            
+            # Is the match finished?
+            try:
+                state = i.find('span').text
+            except AttributeError:
+                pass
+        
+        elif tag == "a":
+            url = i.attrib['href']
+            url = url.split('/?')[0].strip('/')  # Trim weird shit that causes duplicates.
+            url = "http://www.flashscore.com/" + url
+            score_home, score_away = i.text.split(':')
+            if not state:
+                state = i.attrib['class']
+            if score_away.endswith('aet'):
+                score_away = score_away.replace('aet', "").strip()
+                time = "AET"
+            elif score_away.endswith('pen'):
+                score_away = score_away.replace('pen', "").strip()
+                time = "After Pens"
+            
+            try:
+                score_home = int(score_home)
+                score_away = int(score_away)
+            except ValueError:
+                score_home, score_away = 0, 0
+        
+        elif tag == "img":  # Red Cards
+            if "rcard" in i.attrib['class']:
+                cards = "`" + "🟥" * int("".join([i for i in i.attrib['class'] if i.isdigit()])) + "`"
+                if " - " in "".join(capture_group):
+                    away_cards = cards
+                else:
+                    home_cards = cards
+            else:
+                print("Live scores loop / Unhandled class for ", "".join(capture_group), i.attrib['class'])
+        
+        elif tag == "br":
+            # End of match row.
+            try:
+                home, away = "".join(capture_group).split(' - ', 1)  # Olympia HK can suck my fucking cock
+            except ValueError:
+                print("fetch_games Value error", capture_group)
+                continue
+            
+            # DEBUG
+            if time == "Half Time":
+                state = "ht"
+            
+            rows.append(dict(time=time, home=home.strip(), away=away.strip(), url=url, country=country, league=league,
+                             score_home=score_home, score_away=score_away, away_cards=away_cards,
+                             home_cards=home_cards, state=state, date=date))
+            
+            # Clear attributes
+            home_cards = ""
+            away_cards = ""
+            state = None
+            capture_group = []
+    return rows
+
+
+# livesoccertv
+@html_parser.extractor("tv_schedule")
+def tv_schedule(tree, team: bool) -> typing.List[str]:
+    """ Upcoming & live televised games from a livesoccertv schedule, as embed lines """
+    tvlist = []
+    match_column = 5 if team else 3
+    
+    for i in html_parser.xpath(".//table[@class='schedules'][1]//tr")(tree):
+        # Discard finished games.
+        complete = "".join(html_parser.xpath('.//td[@class="livecell"]//span/@class')(i)).strip()
+        if complete in ["narrow ft", "narrow repeat"]:
+            continue
+        
+        match = "".join(html_parser.xpath(f'.//td[{match_column}]//text()')(i)).strip()
+        if not match:
+            continue
+        ml = html_parser.xpath(f'.//td[{match_column + 1}]//text()')(i)
+        
+        try:
+            link = html_parser.xpath(f'.//td[{match_column + 1}]//a/@href')(i)[-1]
+            link = f"http://www.livesoccertv.com/{link}"
+        except IndexError:
+            link = ""
+        
+        ml = ", ".join([x.strip() for x in ml if x != "nufcTV" and x.strip() != ""])
+        
+        if not ml:
+            continue
+        
+        date = "".join(html_parser.xpath('.//td[@class="datecell"]//span/text()')(i)).strip()
+        time = "".join(html_parser.xpath('.//td[@class="timecell"]//span/text()')(i)).strip()
+        
+        if complete != "narrow live":
+            # Correct TimeZone offset.
+            try:
+                time = datetime.datetime.strptime(time, '%H:%M') + datetime.timedelta(hours=5)
+                time = datetime.datetime.strftime(time, '%H:%M')
+                dt = f"{date} {time}"
+            except ValueError as e:
+                print("ValueError in tv", e)
+                dt = ""
+        
+        elif not team:
+            dt = html_parser.xpath('.//td[@class="timecell"]//span/text()')(i)[-1].strip()
+            if dt == "FT":
+                continue
+            if dt != "HT" and ":" not in dt:
+                dt = f"LIVE {dt}'"
+        else:
+            if date == datetime.datetime.now().strftime("%b %d"):
+                dt = time
+            else:
+                dt = date
+        
+        tvlist.append(f'`{dt}` [{match}]({link})')
+    return tvlist
+
+
+# transfermarkt
+@html_parser.extractor("transfer_ticker")
+def transfer_ticker_rows(tree) -> typing.List[dict]:
+    """ Latest transfers from transfermarkt, newest first, with links fixed & markdown built """
+    rows = []
+    for i in html_parser.xpath('.//div[@class="responsive-table"]/div/table/tbody/tr')(tree):
+        player_name = "".join(html_parser.xpath('.//td[1]//tr[1]/td[2]/a/text()')(i)).strip()
+        if not player_name:
+            continue
+        
+        # Player Info
+        player_link = "".join(html_parser.xpath('.//td[1]//tr[1]/td[2]/a/@href')(i))
+        age = "".join(html_parser.xpath('./td[2]//text()')(i)).strip()
+        pos = "".join(html_parser.xpath('./td[1]//tr[2]/td/text()')(i))
+        nat = html_parser.xpath('.//td[3]/img/@title')(i)
+        flags = []
+        for j in nat:
+            flags.append(get_flag(j))
+        # nationality = ", ".join([f'{j[0]} {j[1]}' for j in list(zip(flags,nat))])
+        nationality = "".join(flags)
+        
+        # Leagues & Fee
+        new_team = "".join(html_parser.xpath('.//td[5]/table//tr[1]/td/a/text()')(i)).strip()
+        new_team_link = "".join(html_parser.xpath('.//td[5]/table//tr[1]/td/a/@href')(i)).strip()
+        new_league = "".join(html_parser.xpath('.//td[5]/table//tr[2]/td/a/text()')(i)).strip()
+        new_league_link = "".join(html_parser.xpath('.//td[5]/table//tr[2]/td/a/@href')(i)).strip()
+        new_league_flag = get_flag("".join(html_parser.xpath('.//td[5]/table//tr[2]/td//img/@alt')(i)))
+        
+        old_team = "".join(html_parser.xpath('.//td[4]/table//tr[1]/td/a/text()')(i)).strip()
+        old_team_link = "".join(html_parser.xpath('.//td[4]/table//tr[1]/td/a/@href')(i)).strip()
+        old_league = "".join(html_parser.xpath('.//td[4]/table//tr[2]/td/a/text()')(i)).strip()
+        old_league_link = "".join(html_parser.xpath('.//td[4]/table//tr[2]/td/a/@href')(i)).strip()
+        old_league_flag = get_flag("".join(html_parser.xpath('.//td[4]/table//tr[2]/td//img/@alt')(i)))
+        
+        # Fix Links
+        if "transfermarkt" not in new_team_link:
+            new_team_link = "https://www.transfermarkt.co.uk" + new_team_link if new_team_link else ""
+        if "transfermarkt" not in new_league_link:
+            new_league_link = f"https://www.transfermarkt.co.uk" + new_league_link if new_league_link else ""
+        if "transfermarkt" not in old_team_link:
+            old_team_link = "https://www.transfermarkt.co.uk" + old_team_link if old_team_link else ""
+        if "transfermarkt" not in old_league_link:
+            old_league_link = "https://www.transfermarkt.co.uk" + old_league_link if old_league_link else ""
+        
+        # Markdown.
+        new_league_markdown = "" if "None" in new_league else f"{new_league_flag} [{new_league}]({new_league_link})"
+        new_team_markdown = f"[{new_team}]({new_team_link})"
+        old_league_markdown = "" if "None" in old_league else f"{old_league_flag} [{old_league}]({old_league_link})"
+        old_team_markdown = f"[{old_team}]({old_team_link})"
+        
+        if new_league == old_league:
+            move = f"{old_team} to {new_team} ({new_league_flag} {new_league})"
+        else:
+            move = f"{old_team} ({old_league_flag} {old_league}) to {new_team} ({new_league_flag} {new_league})"
+        
+        move_info = move.replace(" (None )", "")
+        
+        fee = "".join(html_parser.xpath('.//td[6]//a/text()')(i))
+        fee_link = "https://www.transfermarkt.co.uk" + "".join(html_parser.xpath('.//td[6]//a/@href')(i))
+        fee_markdown = f"[{fee}]({fee_link})"
+        
+        # Player picture, re-hosted on imgur by the ticker.
+        th = "".join(html_parser.xpath('.//td[1]//tr[1]/td[1]/img/@src')(i))
+        rows.append(dict(player_name=player_name, player_link=player_link, age=age, pos=pos, nationality=nationality,
+                         new_team_link=new_team_link, new_league_link=new_league_link,
+                         old_team_link=old_team_link, old_league_link=old_league_link,
+                         new_team_markdown=new_team_markdown, new_league_markdown=new_league_markdown,
+                         old_team_markdown=old_team_markdown, old_league_markdown=old_league_markdown,
+                         move_info=move_info, fee=fee, fee_link=fee_link, fee_markdown=fee_markdown, thumbnail=th))
+    return rows
+
+
+def parse_players(trs):
+    output, targets = [], []
+    for i in trs:
+        pname = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()')(i))
+        player_link = "".join(html_parser.xpath('.//a[@class="spielprofil_tooltip"]/@href')(i))
+        if "transfermarkt" not in player_link:
+            player_link = "http://transfermarkt.co.uk" + player_link
+
+        team = "".join(html_parser.xpath('.//td[3]/a/img/@alt')(i))
+        tlink = "".join(html_parser.xpath('.//td[3]/a/img/@href')(i))
+        if "transfermarkt" not in tlink:
+            tlink = "http://transfermarkt.co.uk" + tlink
+        age = "".join(html_parser.xpath('.//td[4]/text()')(i))
+        ppos = "".join(html_parser.xpath('.//td[2]/text()')(i))
+        flag = get_flag("".join(html_parser.xpath('.//td/img[1]/@title')(i)))
+
+        output.append(f"{flag} [{pname}]({player_link}) {age}, {ppos} [{team}]({tlink})")
+        targets.append(player_link)
+    return output, targets
+
+
+def parse_managers(trs):
+    output, targets = [], []
+    for i in trs:
+        mname = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a/text()')(i))
+        mlink = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a/@href')(i))
+        if "transfermarkt" not in mlink:
+            mlink = "http://transfermarkt.co.uk" + mlink
+
+        team = "".join(html_parser.xpath('.//td[2]/a/img/@alt')(i))
+        tlink = "".join(html_parser.xpath('.//td[2]/a/img/@href')(i))
+        if "transfermarkt" not in tlink:
+            tlink = "http://transfermarkt.co.uk" + tlink
+        age = "".join(html_parser.xpath('.//td[3]/text()')(i))
+        job = "".join(html_parser.xpath('.//td[5]/text()')(i))
+        flag = get_flag("".join(html_parser.xpath('.//td/img[1]/@title')(i)))
+
+        output.append(f"{flag} [{mname}]({mlink}) {age}, {job} [{team}]({tlink})")
+        targets.append(mlink)
+    return output, targets
+
+
+def parse_clubs(trs):
+    output, targets = [], []
+    for i in trs:
+        cname = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a/text()')(i))
+        clink = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a/@href')(i))
+        if "transfermarkt" not in clink:
+            clink = "http://transfermarkt.co.uk" + clink
+        league = "".join(html_parser.xpath('.//tr[2]/td/a/text()')(i))
+        league_link = "".join(html_parser.xpath('.//tr[2]/td/a/@href')(i))
+        flag = get_flag("".join(html_parser.xpath('.//td/img[1]/@title')(i)[-1]).strip())
+        if league:
+            club = f"[{cname}]({clink}) ([{league}]({league_link}))"
+        else:
+            club = f"[{cname}]({clink})"
+
+        output.append(f"{flag} {club}")
+        targets.append(clink)
+    return output, targets
+
+
+def parse_refs(trs):
+    output, targets = [], []
+    for i in trs:
+        rname = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a/text()')(i)).strip()
+        rlink = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a/@href')(i)).strip()
+        if "transfermarkt" not in rlink:
+            rlink = "http://transfermarkt.co.uk" + rlink
+        
+        rage = "".join(html_parser.xpath('.//td[@class="zentriert"]/text()')(i)).strip()
+        flag = get_flag("".join(html_parser.xpath('.//td/img[1]/@title')(i)).strip())
+
+        output.append(f"{flag} [{rname}]({rlink}) {rage}")
+        targets.append(rlink)
+    return output, targets
+
+
+def parse_leagues(trs):
+    output, targets = [], []
+    for i in trs:
+        cupname = "".join(html_parser.xpath('.//td[2]/a/text()')(i)).strip()
+        cup_link = "".join(html_parser.xpath('.//td[2]/a/@href')(i)).strip()
+        if "transfermarkt" not in cup_link:
+            cup_link = "http://transfermarkt.co.uk" + cup_link
+        flag = "".join(html_parser.xpath('.//td[3]/img/@title')(i)).strip()
+        if flag:
+            flag = get_flag(flag)
+        else:
+            flag = "🌍"
+
+        output.append(f"{flag} [{cupname}]({cup_link})")
+        targets.append(cup_link)
+    return output, targets
+
+
+def parse_int(trs):
+    output, targets = [], []
+    for i in trs:
+        cup_name = "".join(html_parser.xpath('.//td[2]/a/text()')(i))
+        cup_link = "".join(html_parser.xpath('.//td[2]/a/@href')(i))
+        if "transfermarkt" not in cup_link:
+            cup_link = "http://transfermarkt.co.uk" + cup_link
+        output.append(f"🌍 [{cup_name}]({cup_link})")
+        targets.append(cup_link)
+    return output, targets
+
+
+def parse_agent(trs):
+    output, targets = [], []
+    for i in trs:
+        company = "".join(html_parser.xpath('.//td[2]/a/text()')(i))
+        link = "".join(html_parser.xpath('.//td[2]/a/@href')(i))
+        if "transfermarkt" not in link:
+            link = "http://transfermarkt.co.uk" + link
+        output.append(f"[{company}]({link})")
+        targets.append(link)
+    return output, targets
+
+
+# Picked by name, the parse pool can only be handed plain data.
+SEARCH_PARSERS = {
+    "players": parse_players,
+    "managers": parse_managers,
+    "clubs": parse_clubs,
+    "referees": parse_refs,
+    "leagues": parse_leagues,
+    "international": parse_int,
+    "agents": parse_agent
+}
+
+
+@html_parser.extractor("transfermarkt_search")
+def search_results(tree, categ, parser) -> typing.Tuple[str, typing.List[str], typing.List[str]]:
+    """ Header, lines & links from one category of a transfermarkt quick search, parser is a SEARCH_PARSERS key """
+    header = "".join(html_parser.xpath(f".//div[@class='table-header'][contains(text(),'{categ}')]/text()")(tree))
+
+    # Get trs of table after matching header / {categ} name.
+    matches = f".//div[@class='box']/div[@class='table-header'][contains(text(),'{categ}')]/following::div[" \
+              f"1]//tbody/tr"
+    lines, targets = SEARCH_PARSERS[parser](html_parser.xpath(matches)(tree))
+    return header, lines, targets
+
+
+@html_parser.extractor("transfermarkt_transfers")
+def transfers_page(tree) -> typing.Tuple[str, list, list, list, list]:
+    """ Title, then players in, loans in, players out & loans out from a club's transfers page, as embed lines """
+    title = "".join(html_parser.xpath('.//head/title/text()')(tree))
+    ignore, intable, outtable = html_parser.xpath('.//div[@class="large-8 columns"]/div[@class="box"]')(tree)
+    
+    intable = html_parser.xpath('.//tbody/tr')(intable)
+    outtable = html_parser.xpath('.//tbody/tr')(outtable)
+    
+    inlist, inloans, outlist, outloans = [], [], [], []
+    
+    for i in intable:
+        pname = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()')(i))
+        player_link = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/@href')(i))
+        
+        player_link = f"http://transfermarkt.co.uk{player_link}"
+        age = "".join(html_parser.xpath('.//td[3]/text()')(i))
+        ppos = "".join(html_parser.xpath('.//td[2]//tr[2]/td/text()')(i))
+        try:
+            flag = get_flag(html_parser.xpath('.//td[4]/img[1]/@title')(i)[0])
+        except IndexError:
+            flag = ""
+        fee = "".join(html_parser.xpath('.//td[6]//text()')(i))
+        if "loan" in fee.lower():
+            inloans.append(f"{flag} [{pname}]({player_link}) {ppos}, {age}\n")
+            continue
+        inlist.append(f"{flag} [{pname}]({player_link}) {ppos}, {age} ({fee})\n")
+    
+    for i in outtable:
+        pname = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()')(i))
+        player_link = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/@href')(i))
+        player_link = f"http://transfermarkt.co.uk{player_link}"
+        flag = get_flag(html_parser.xpath('.//td/img[1]/@title')(i)[1])
+        fee = "".join(html_parser.xpath('.//td[6]//text()')(i))
+        if "loan" in fee.lower():
+            outloans.append(f"{flag} [{pname}]({player_link}), ")
+            continue
+        outlist.append(f"{flag} [{pname}]({player_link}), ")
+    return title, inlist, inloans, outlist, outloans
+
+
+@html_parser.extractor("transfermarkt_rumours")
+def rumours_page(tree) -> typing.Tuple[str, typing.List[str]]:
+    """ Title & rumoured signings from a club's rumours page, as embed lines """
+    title = html_parser.xpath('.//head/title[1]/text()')(tree)[0]
+    rumours = html_parser.xpath('.//div[@class="large-8 columns"]/div[@class="box"]')(tree)[0]
+    rumours = html_parser.xpath('.//tbody/tr')(rumours)
+    rumorlist = []
+    for i in rumours:
+        pname = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()')(i))
+        if not pname:
+            continue
+        player_link = "".join(html_parser.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/@href')(i))
+        player_link = f"http://transfermarkt.co.uk{player_link}"
+        ppos = "".join(html_parser.xpath('.//td[2]//tr[2]/td/text()')(i))
+        flag = get_flag(html_parser.xpath('.//td[3]/img/@title')(i)[0])
+        age = "".join(html_parser.xpath('./td[4]/text()')(i)).strip()
+        team = "".join(html_parser.xpath('.//td[5]//img/@alt')(i))
+        team_link = "".join(html_parser.xpath('.//td[5]//img/@href')(i))
+        if "transfermarkt" not in team_link:
+            team_link = "http://www.transfermarkt.com" + team_link
+        source = "".join(html_parser.xpath('.//td[8]//a/@href')(i))
+        src = f"[Info]({source})"
+        rumorlist.append(f"{flag} **[{pname}]({player_link})** ({src})\n{age}, {ppos} [{team}]({team_link})\n\n")
+    return str(title), rumorlist
+
+
+# footballgroundmap
+@html_parser.extractor("stadium")
+def stadium_page(tree) -> dict:
+    """ Picture, teams, location & stats from a footballgroundmap stadium page """
+    this = dict()
+    this['image'] = "".join(html_parser.xpath('.//div[@class="page-img"]/img/@src')(tree))
+    # Teams
+    old = html_parser.xpath('.//tr/th[contains(text(), "Former home")]/following-sibling::td')(tree)
+    home = html_parser.xpath('.//tr/th[contains(text(), "home to")]/following-sibling::td')(tree)
+    
+    for s in home:
+        team_list = []
+        links = html_parser.xpath('.//a/@href')(s)
+        teams = html_parser.xpath('.//a/text()')(s)
+        for x, y in list(zip(teams, links)):
+            if "/team/" in y:
+                team_list.append(f"[{x}]({y})")
+        this['home'] = team_list
+    
+    for s in old:
+        team_list = []
+        links = html_parser.xpath('.//a/@href')(s)
+        teams = html_parser.xpath('.//a/text()')(s)
+        for x, y in list(zip(teams, links)):
+            if "/team/" in y:
+                team_list.append(f"[{x}]({y})")
+        this['old'] = team_list
+    
+    this['map_link'] = "".join(html_parser.xpath('.//figure/img/@src')(tree))
+    
+    def field(label):
+        return "".join(html_parser.xpath(f'.//tr/th[contains(text(), "{label}")]/following-sibling::td//text()')(tree))
+    
+    this['address'] = field("Address")
+    this['capacity'] = field("Capacity")
+    this['cost'] = field("Cost")
+    this['website'] = field("Website")
+    this['att'] = field("Record attendance")
+    return this
+
+
+@html_parser.extractor("stadium_search")
+def stadium_search(tree, query) -> typing.List[dict]:
+    """ Stadiums matching a footballgroundmap search, as Stadium kwargs """
+    results = html_parser.xpath(".//div[@class='using-grid'][1]/div[@class='grid']/div")(tree)
+    stadiums = []
+    for i in results:
+        team = "".join(html_parser.xpath('.//small/preceding-sibling::a//text()')(i)).title()
+        team_badge = html_parser.xpath('.//img/@src')(i)[0]
+        ctry_league = html_parser.xpath('.//small/a//text()')(i)
+        
+        if not ctry_league:
+            continue
+        country = ctry_league[0]
+        try:
+            league = ctry_league[1]
+        except IndexError:
+            league = ""
+        
+        sub_nodes = html_parser.xpath('.//small/following-sibling::a')(i)
+        for s in sub_nodes:
+            name = "".join(html_parser.xpath('.//text()')(s)).title()
+            link = "".join(html_parser.xpath('./@href')(s))
+            
+            if query.lower() not in name.lower() and query.lower() not in team.lower():
+                continue  # Filtering.
+            
+            if not any(c["name"] == name for c in stadiums) and not any(c["url"] == link for c in stadiums):
+                stadiums.append(dict(url=link, name=name, team=team, team_badge=str(team_badge),
+                                     country=str(country), league=str(league)))
+    return stadiums
@@ -0,0 +1,88 @@
+import pycountry
+
+# Manual Country Code Flag Dict
+country_dict = {
+    "American Virgin Islands": "vi",
+    "Antigua and Barbuda": "ag",
+    "Bolivia": "bo",
+    "Bosnia-Herzegovina": "ba",
+    "Bosnia and Herzegovina": "ba",
+    "Botsuana": "bw",
+    "British Virgin Islands": "vg",
+    "Cape Verde": "cv",
+    "Cayman-Inseln": "ky",
+    "Chinese Taipei (Taiwan)": "tw",
+    "Congo DR": "cd",
+    "Curacao": "cw",
+    "DR Congo": "cd",
+    "Cote d'Ivoire": "ci",
+    "CSSR": "cz",
+    "Czech Republic": "cz",
+    "England": "gb",
+    "Faroe Island": "fo",
+    "Federated States of Micronesia": "fm",
+    "Hongkong": "hk",
+    "Iran": "ir",
+    "Ivory Coast": "ci",
+    "Korea, North": "kp",
+    "Korea, South": "kr",
+    "Kosovo": "xk",
+    "Laos": "la",
+    "Macedonia": "mk",
+    "Mariana Islands": "mp",
+    "Moldova": "md",
+    "N/A": "x",
+    "Netherlands Antilles": "nl",
+    "Neukaledonien": "nc",
+    "Northern Ireland": "gb",
+    "Osttimor": "tl",
+    "Palästina": "ps",
+    "Russia": "ru",
+    "Scotland": "gb",
+    "Sint Maarten": "sx",
+    "Southern Sudan": "ss",
+    "South Korea": "kr",
+    "St. Kitts & Nevis": "kn",
+    "St. Louis": "lc",
+    "St. Vincent & Grenadinen": "vc",
+    "Tahiti": "fp",
+    "Tanzania": "tz",
+    "The Gambia": "gm",
+    "Trinidad and Tobago": "tt",
+    "Turks- and Caicosinseln": "tc",
+    "Sao Tome and Princip": "st",
+    "USA": "us",
+    "Venezuela": "ve",
+    "Vietnam": "vn",
+    "Wales": "gb"}
+
+unidict = {
+    "a": "🇦", "b": "🇧", "c": "🇨", "d": "🇩", "e": "🇪",
+    "f": "🇫", "g": "🇬", "h": "🇭", "i": "🇮", "j": "🇯",
+    "k": "🇰", "l": "🇱", "m": "🇲", "n": "🇳", "o": "🇴",
+    "p": "🇵", "q": "🇶", "r": "🇷", "s": "🇸", "t": "🇹",
+    "u": "🇺", "v": "🇻", "w": "🇼", "x": "🇽", "y": "🇾", "z": "🇿"
+}
+
+
+def get_flag(country):
+    # Check if pycountry has country
+    if not country:
+        return
+    if country.lower() in ["england", "scotland", "wales"]:
+        country = f":{country.lower()}:"
+        return country
+
+    try:
+        country = pycountry.countries.get(name=country.title()).alpha_2
+    except (KeyError, AttributeError):
+        try:
+            # else revert to manual dict.w
+            country = country_dict[country]
+        except KeyError:
+            return country  # Shrug.
+    country = country.lower()
+
+    for key, value in unidict.items():
+        country = country.replace(key, value)
+    return country
@@ -0,0 +1,195 @@
+""" Flashscore search, cached in memory with an on-disk index of every team & competition seen. """
+import asyncio
+import difflib
+import json
+import os
+import re
+import time
+import typing
+import urllib.parse
+from collections import Counter, defaultdict
+from json import JSONDecodeError
+
+import aiohttp
+
+from ext.utils import http_client
+
+SEARCH_URL = "https://s.flashscore.com/search/?q={}&l=1&s=1&f=1%3B1&pid=2&sid=1"
+INDEX_FILE = "search_index.json"
+CACHE_TTL = 10 * 60  # Seconds to keep a search result in memory.
+INDEX_TTL = 7 * 24 * 60 * 60  # Seconds before a stored query is looked up again online.
+SAVE_DELAY = 30  # Seconds to gather index changes before writing them out.
+
+
+def normalise(query) -> str:
+    for r in ["'", "[", "]", "#", '<', '>']:
+        query = query.replace(r, "")
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchService:
+    """ Single-flight flashscore search with a TTL cache and a persistent index of results. """
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.cache = {}  # query: (expires, [result dicts])
+        self.inflight = {}  # query: Future shared by identical concurrent searches
+        self.entities = {}  # "type:id": result dict
+        self.queries = {}  # query: [timestamp, ["type:id", ...]]
+        self.names = defaultdict(list)  # normalised title: ["type:id", ...]
+        self.dirty = False
+        self.save_task = None
+        self.stats = Counter()
+        self.load()
+
+    def __repr__(self):
+        return f"SearchService({len(self.entities)} indexed, {len(self.queries)} queries, {dict(self.stats)})"
+
+    @staticmethod
+    def key(result) -> str:
+        return f"{result['participant_type_id']}:{result['id']}"
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.entities = data.get("entities", {})
+        self.queries = data.get("queries", {})
+        for k, v in self.entities.items():
+            self.names[normalise(v.get("title", ""))].append(k)
+
+    def snapshot(self) -> dict:
+        # Shallow copies are enough, results & query entries are replaced rather than changed in place.
+        return {"entities": dict(self.entities), "queries": dict(self.queries)}
+
+    def save(self, snapshot=None):
+        """ Write the index to a temporary file then swap it in, so a crash mid write can't truncate it. """
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot() if snapshot is None else snapshot, f)
+        os.replace(tmp, self.path)
+
+    def schedule_save(self):
+        """ Batch index writes, a burst of searches only writes the file once. """
+        self.dirty = True
+        if self.save_task is None or self.save_task.done():
+            self.save_task = asyncio.ensure_future(self.save_later())
+
+    async def save_later(self):
+        loop = asyncio.get_event_loop()
+        while self.dirty:
+            await asyncio.sleep(SAVE_DELAY)
+            self.dirty = False
+            # Copy on the event loop, searches can't change the index while the executor thread serialises it.
+            snapshot = self.snapshot()
+            try:
+                await loop.run_in_executor(None, self.save, snapshot)
+            except OSError as err:
+                print(f"Unable to save the flashscore search index: {err}")
+
+    async def search(self, query, session=None) -> typing.List[dict]:
+        """ Raw flashscore results for a query, from memory, the index, or the network in that order. """
+        query = normalise(query)
+
+        cached = self.cache.get(query)
+        if cached is not None and cached[0] > time.monotonic():
+            self.stats["cache"] += 1
+            return cached[1]
+
+        results = self.offline(query)
+        if results is not None:
+            self.stats["index"] += 1
+            self.cache[query] = (time.monotonic() + CACHE_TTL, results)
+            return results
+
+        future = self.inflight.get(query)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = self.inflight[query] = asyncio.get_event_loop().create_future()
+        try:
+            results = await self.fetch(query, session)
+        except ConnectionError as err:
+            # Flashscore is down or we are, guess from the index but don't store the guesses as the answer.
+            results = self.fuzzy(query)
+            if not results:
+                future.set_exception(AssertionError(str(err)))
+                future.exception()  # Mark as retrieved, in case nobody else was waiting on it.
+                raise AssertionError(str(err))
+            self.stats["fuzzy"] += 1
+            future.set_result(results)
+            return results
+        except Exception as err:
+            future.set_exception(err)
+            future.exception()
+            raise
+        else:
+            future.set_result(results)
+        finally:
+            del self.inflight[query]
+
+        self.stats["network"] += 1
+        if len(self.cache) > 1000:
+            now = time.monotonic()
+            self.cache = {k: v for k, v in self.cache.items() if v[0] > now}
+        self.cache[query] = (time.monotonic() + CACHE_TTL, results)
+        self.remember(query, results)
+        self.schedule_save()
+        return results
+
+    def offline(self, query) -> typing.Optional[typing.List[dict]]:
+        """ Answer from the index if this exact query was looked up recently. """
+        stored = self.queries.get(query)
+        if stored is not None and stored[0] + INDEX_TTL > time.time():
+            return [self.entities[k] for k in stored[1] if k in self.entities]
+        return None
+
+    def fuzzy(self, query, limit=10) -> typing.List[dict]:
+        """ Best guesses from the index, exact names first, then by word prefix, then by similarity.
+        Only for when we can't get online, an exact name can still be one of many teams a search would return. """
+        exact = self.names.get(query, [])
+        words = query.split()
+        prefixed = [k for n, keys in self.names.items() if all(any(w.startswith(q) for w in n.split()) for q in words)
+                    for k in keys]
+        close = difflib.get_close_matches(query, self.names.keys(), n=limit, cutoff=0.6)
+        keys = list(dict.fromkeys(exact + prefixed[:limit] + [k for i in close for k in self.names[i]]))
+        return [self.entities[k] for k in keys[:limit]]
+
+    def remember(self, query, results):
+        for i in results:
+            key = self.key(i)
+            if key not in self.entities:
+                self.names[normalise(i.get("title", ""))].append(key)
+            self.entities[key] = i
+        self.queries[query] = [time.time(), [self.key(i) for i in results]]
+
+    async def fetch(self, query, session=None) -> typing.List[dict]:
+        url = SEARCH_URL.format(urllib.parse.quote(query))
+        session = session or http_client.get_client()
+        try:
+            async with session.get(url) as resp:
+                res = await resp.text(encoding="utf-8")
+                status = resp.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            raise ConnectionError("Unable to reach flashscore, please try again later.")
+
+        if status != 200:
+            raise ConnectionError(f"Server returned a {status} error, please try again later.")
+
+        # Un-fuck FS JSON reply.
+        res = res.lstrip('cjs.search.jsonpCallback(').rstrip(");")
+        try:
+            res = json.loads(res)
+        except JSONDecodeError:
+            print(f"Json error attempting to decode query: {query}\n", res)
+            raise AssertionError('Something you typed broke the search query. Please only specify a team or league name.')
+
+        try:
+            return [i for i in res['results'] if i['participant_type_id'] in (0, 1)]
+        except KeyError:
+            return []
+
+
+service = SearchService()
@@ -1,6 +1,5 @@
-from json import JSONDecodeError
+from collections import defaultdict
 
-from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 from ext.utils import embed_utils
 from io import BytesIO
@@ -10,9 +9,10 @@ import datetime
 import aiohttp
 import discord
 import typing
-import json
+import re
+import asyncio
 
-from ext.utils import selenium_driver, transfer_tools, image_utils
+from ext.utils import selenium_driver, transfer_tools, image_utils, flashscore_search, http_client, html_parser
 from importlib import reload
 
 reload(selenium_driver)
@@ -31,6 +31,25 @@ FLASH_SCORE_ADS = [(By.XPATH, './/div[@class="seoAdWrapper"]'),
                    (By.XPATH, './/div[contains(@id,"box-over-content")]')
                    ]
 
+# Seconds to keep screenshots, league images are also dropped by the scores loop on goals / full time.
+TABLE_IMAGE_TTL = 60 * 60
+STATS_IMAGE_TTL = 2 * 60
+SUMMARY_IMAGE_TTL = 5 * 60
+FORMATION_IMAGE_TTL = 30 * 60
+
+
+async def cached_image(bot, key, capture, ttl, *tags) -> typing.Optional[BytesIO]:
+    """ Checks the image cache before leasing a browser to run capture(driver). """
+    return await selenium_driver.image_cache.capture(bot.browsers, key, capture, ttl, tags=tags)
+
+
+def fixture_tags(fixture) -> typing.List[str]:
+    # Live games get tagged by url as well, so a goal can clear that game's images too.
+    tags = [fixture.url] if hasattr(fixture, "url") else []
+    if fixture.country and fixture.league:
+        tags.append(fixture.full_league)
+    return tags
+
 
 class MatchEvent:
     def __init__(self):
@@ -214,37 +233,51 @@ class Fixture:
         script = "var element = document.getElementsByClassName('overview')[0];" \
                  "element.style.position = 'fixed';element.style.backgroundColor = '#ddd';" \
                  "element.style.zIndex = '999';"
-        image = selenium_driver.get_image(driver, self.url + "#draw", xpath=xp, clicks=clicks, delete=FLASH_SCORE_ADS,
-                                          script=script, failure_message="Unable to find bracket for that tournament.")
-        return image
+        return selenium_driver.get_image(driver, self.url + "#draw", xpath=xp, clicks=clicks, delete=FLASH_SCORE_ADS,
+                                         script=script, failure_message="Unable to find bracket for that tournament.")
     
     def get_table(self, driver) -> BytesIO:
         clicks = [(By.XPATH, ".//span[@class='button cookie-law-accept']")]
         xp = './/div[contains(@class, "tableWrapper")]'
-        
-        image = selenium_driver.get_image(driver, self.url + "#standings;table;overall", xp, delete=FLASH_SCORE_ADS,
-                                          clicks=clicks, failure_message="No table found for this league.")
-
-        return image
+        return selenium_driver.get_image(driver, self.url + "#standings;table;overall", xp, delete=FLASH_SCORE_ADS,
+                                         clicks=clicks, failure_message="No table found for this league.")
     
     def stats_image(self, driver) -> BytesIO:
         xp = ".//div[@class='statBFox']"
-        image = selenium_driver.get_image(driver, self.url + "#match-statistics;0", xp, delete=FLASH_SCORE_ADS,
-                                          failure_message="Unable to find live stats for this match.")
-        return image
+        return selenium_driver.get_image(driver, self.url + "#match-statistics;0", xp, delete=FLASH_SCORE_ADS,
+                                         failure_message="Unable to find live stats for this match.")
     
     def get_formation(self, driver) -> BytesIO:
         clicks = [(By.XPATH, './/div[@id="onetrust-accept-btn-handler"]')]
         xp = './/div[@id="lineups-content"]'
-        image = selenium_driver.get_image(driver, self.url + "#lineups;1", xp, delete=FLASH_SCORE_ADS, clicks=clicks,
-                                          failure_message="Unable to find formations for this match")
-        return image
+        return selenium_driver.get_image(driver, self.url + "#lineups;1", xp, delete=FLASH_SCORE_ADS,
+                                         clicks=clicks, failure_message="Unable to find formations for this match")
     
     def summary(self, driver) -> BytesIO:
         xp = ".//div[@id='summary-content']"
-        image = selenium_driver.get_image(driver, self.url + "#match-summary", xp, delete=FLASH_SCORE_ADS,
-                                          failure_message="Unable to find summary for this match")
-        return image
+        return selenium_driver.get_image(driver, self.url + "#match-summary", xp, delete=FLASH_SCORE_ADS,
+                                         failure_message="Unable to find summary for this match")
+    
+    # Cached versions of the captures above, for commands.
+    async def bracket_image(self, bot) -> typing.Optional[BytesIO]:
+        key = (self.url + "#draw", "bracket")
+        return await cached_image(bot, key, self.bracket, TABLE_IMAGE_TTL, *fixture_tags(self))
+    
+    async def table_image(self, bot) -> typing.Optional[BytesIO]:
+        key = (self.url + "#standings;table;overall", "table")
+        return await cached_image(bot, key, self.get_table, TABLE_IMAGE_TTL, *fixture_tags(self))
+    
+    async def match_stats_image(self, bot) -> typing.Optional[BytesIO]:
+        key = (self.url + "#match-statistics;0", "stats")
+        return await cached_image(bot, key, self.stats_image, STATS_IMAGE_TTL, *fixture_tags(self))
+    
+    async def formation_image(self, bot) -> typing.Optional[BytesIO]:
+        key = (self.url + "#lineups;1", "formation")
+        return await cached_image(bot, key, self.get_formation, FORMATION_IMAGE_TTL, *fixture_tags(self))
+    
+    async def summary_image(self, bot) -> typing.Optional[BytesIO]:
+        key = (self.url + "#match-summary", "summary")
+        return await cached_image(bot, key, self.summary, SUMMARY_IMAGE_TTL, *fixture_tags(self))
 
     def head_to_head(self, driver) -> typing.Dict:
         xp = ".//div[@id='tab-h2h-overall']"
@@ -386,13 +419,271 @@ class Fixture:
         # TODO: Fetching images
         self.images = tree.xpath('.//div[@class="highlight-photo"]//img/@src')
         # TODO: fetching statistics
+
+
+def _invalidates_display(name):
+    """ Attribute on a LiveFixture that drops its cached display strings when its value changes. """
+    slot = "_" + name
+    
+    def fget(self):
+        return getattr(self, slot)
+    
+    def fset(self, value):
+        if getattr(self, slot) == value:
+            return
+        setattr(self, slot, value)
+        self._bold_score = self._live_score_text = self._state_colour = self._full_league = None
+    return property(fget, fset)
+
+
+class LiveFixture:
+    """ Compact fixture for the live scores loop, display strings are cached until the match changes. """
+    __slots__ = ("home", "away", "url", "date", "_time", "_state", "_country", "_league", "_score_home", "_score_away",
+                 "_home_cards", "_away_cards", "_bold_score", "_live_score_text", "_state_colour", "_full_league",
+                 # Only filled in when a goal or red card triggers a refresh.
+                 "kickoff", "referee", "stadium", "comp_link", "events", "images", "penalties_home", "penalties_away",
+                 "formation", "table")
+    
+    def __init__(self, time, home, away, url, country, league, date, state=None, score_home=None, score_away=None,
+                 home_cards="", away_cards=""):
+        self.home = home
+        self.away = away
+        self.url = url
+        self.date = date
+        self._time = time
+        self._state = state
+        self._country = country
+        self._league = league
+        self._score_home = score_home
+        self._score_away = score_away
+        self._home_cards = home_cards
+        self._away_cards = away_cards
+        self._bold_score = self._live_score_text = self._state_colour = self._full_league = None
         
+        self.kickoff = self.referee = self.stadium = self.comp_link = self.events = self.images = None
+        self.penalties_home = self.penalties_away = self.formation = self.table = None
+    
+    def __repr__(self):
+        return f"LiveFixture({self.home} vs {self.away}, {self.url})"
+    
+    time = _invalidates_display("time")
+    state = _invalidates_display("state")
+    country = _invalidates_display("country")
+    league = _invalidates_display("league")
+    score_home = _invalidates_display("score_home")
+    score_away = _invalidates_display("score_away")
+    home_cards = _invalidates_display("home_cards")
+    away_cards = _invalidates_display("away_cards")
+    
+    @property
+    def bold_score(self) -> str:
+        if self._bold_score is None:
+            self._bold_score = Fixture.bold_score.fget(self)
+        return self._bold_score
     
+    @property
+    def state_colour(self) -> typing.Tuple:
+        if self._state_colour is None:
+            self._state_colour = Fixture.state_colour.fget(self)
+        return self._state_colour
+    
+    @property
+    def full_league(self) -> str:
+        if self._full_league is None:
+            self._full_league = Fixture.full_league.fget(self)
+        return self._full_league
+    
+    @property
+    def live_score_text(self) -> str:
+        if self._live_score_text is None:
+            # Unlike Fixture, this doesn't overwrite self.time.
+            time = "HT" if self.state == "ht" else "FT" if self.state == "fin" else self.time
+            try:
+                self._live_score_text = f"`{self.state_colour[0]}` {time} {self.home_cards} {self.bold_score} " \
+                                        f"{self.away_cards}"
+            except TypeError:
+                print(f"live_score_text DEBUG: "
+                      f"{self.state_colour}, {self.time}, {self.home_cards}, {self.bold_score}, {self.away_cards})")
+        return self._live_score_text
+    
+    # Everything else behaves exactly as it does on a Fixture.
+    __str__ = Fixture.__str__
+    tv = Fixture.tv
+    base_embed = Fixture.base_embed
+    formatted_time = Fixture.formatted_time
+    score = Fixture.score
+    get_badge = Fixture.get_badge
+    bracket = Fixture.bracket
+    get_table = Fixture.get_table
+    stats_image = Fixture.stats_image
+    get_formation = Fixture.get_formation
+    summary = Fixture.summary
+    bracket_image = Fixture.bracket_image
+    table_image = Fixture.table_image
+    match_stats_image = Fixture.match_stats_image
+    formation_image = Fixture.formation_image
+    summary_image = Fixture.summary_image
+    head_to_head = Fixture.head_to_head
+    refresh = Fixture.refresh
+
+
+class FixtureStore:
+    """ Live fixtures keyed by url, with secondary indexes by league and by date. """
+    def __init__(self):
+        self.by_url = {}
+        self.by_league = defaultdict(dict)
+        self.by_date = defaultdict(dict)
+
+    def __repr__(self):
+        return f"FixtureStore({len(self.by_url)} fixtures, {len(self.by_league)} leagues)"
+
+    def __iter__(self):
+        # Iterate a snapshot so callers can upsert or expire while looping.
+        return iter(list(self.by_url.values()))
+
+    def __len__(self):
+        return len(self.by_url)
+
+    def __contains__(self, url):
+        return url in self.by_url
+
+    def get(self, url) -> typing.Optional[LiveFixture]:
+        return self.by_url.get(url)
+
+    def upsert(self, fixture: LiveFixture):
+        old = self.by_url.get(fixture.url)
+        if old is not None:
+            self._unindex(old)
+        self.by_url[fixture.url] = fixture
+        self.by_league[fixture.full_league][fixture.url] = fixture
+        self.by_date[fixture.date][fixture.url] = fixture
+
+    def remove(self, url) -> typing.Optional[LiveFixture]:
+        fixture = self.by_url.pop(url, None)
+        if fixture is not None:
+            self._unindex(fixture)
+        return fixture
+
+    def _unindex(self, fixture):
+        for index, key in [(self.by_league, fixture.full_league), (self.by_date, fixture.date)]:
+            bucket = index.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(fixture.url, None)
+            if not bucket:
+                del index[key]
+
+    def expire(self, before: datetime.date) -> int:
+        """ Drop every fixture dated before the given day, returns the number removed. """
+        expired = [d for d in self.by_date if d < before]
+        count = 0
+        for d in expired:
+            for url in list(self.by_date[d]):
+                self.remove(url)
+                count += 1
+        return count
+
+    def clear(self):
+        self.by_url.clear()
+        self.by_league.clear()
+        self.by_date.clear()
+
+    @property
+    def leagues(self) -> typing.List[str]:
+        return list(self.by_league)
+
+    def league(self, full_league) -> typing.List[LiveFixture]:
+        return list(self.by_league.get(full_league, {}).values())
+
+
 class Player:
     def __init__(self, **kwargs):
         self.__dict__.update(kwargs)
 
 
+_logos = {}
+_badges = {}
+
+
+async def fetch_badges(session, urls) -> typing.Dict[str, bytes]:
+    """ Team badge images by url, each only downloaded once. """
+    async def fetch(url):
+        try:
+            async with session.get(url) as resp:
+                if resp.status == 200:
+                    _badges[url] = await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+    
+    missing = {i for i in urls if i and i not in _badges}
+    await asyncio.gather(*[fetch(i) for i in missing])
+    return {i: _badges[i] for i in urls if i in _badges}
+
+
+FIXTURES_XPATH = './/div[@class="sportName soccer"]'
+STANDINGS_XPATH = './/div[contains(@class, "tableWrapper")]'
+SUB_TABS_XPATH = './/div[contains(@class, "subTabs")]'
+
+# Team & league pages embed their fixture lists as delimited feeds, e.g. cjs.initialFeeds['results'] = {data: `...`}
+INITIAL_FEED = re.compile(r"cjs\.initialFeeds\['([\w-]+)'\]\s*=\s*\{\s*data:\s*`(.*?)`", re.DOTALL)
+FEED_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:88.0) Gecko/20100101 Firefox/88.0",
+                "Accept-Encoding": "gzip, deflate"}
+FEED_LIVE, FEED_FINISHED = "2", "3"
+FEED_POSTPONED, FEED_AWARDED = "4", "54"
+
+
+def parse_feed(data, games=None) -> typing.List[Fixture]:
+    """ Build Fixtures from flashscore's feed format: records split by ~, fields by ¬, key & value by ÷
+    The feed has no match clock, live games take their minute from the live scores loop's FixtureStore,
+    games it isn't tracking get a time of None. """
+    fixtures = []
+    country, league = None, None
+    now = datetime.datetime.now()
+    for record in data.split("~"):
+        fields = dict(i.split("÷", 1) for i in record.split("¬") if "÷" in i)
+        if "ZA" in fields:  # League header
+            try:
+                country, league = fields["ZA"].split(": ", 1)
+            except ValueError:
+                country, league = "", fields["ZA"]
+            league = league.split(' - ')[0]
+            continue
+        
+        if "AA" not in fields or country is None:
+            continue
+        
+        try:
+            kickoff = datetime.datetime.fromtimestamp(int(fields["AD"]))
+        except (KeyError, ValueError):
+            kickoff = None
+        
+        url = "http://www.flashscore.com/match/" + fields["AA"]
+        status, stage = fields.get("AB"), fields.get("AC")
+        if status == FEED_LIVE:
+            live = games.get(url) if games is not None else None
+            time = None if live is None else f"⚽ LIVE! {live.time}"
+        elif stage == FEED_POSTPONED:
+            time = "🚫 Postponed "
+        elif kickoff is None:
+            time = "?"
+        elif stage == FEED_AWARDED:
+            time = f"{kickoff.strftime('%d/%m/%Y')} 🚫 FF"  # Forfeit
+        elif kickoff.year != now.year:
+            time = kickoff.strftime("%d/%m/%Y")
+        else:
+            time = kickoff
+        
+        try:
+            score_home, score_away = int(fields["AG"]), int(fields["AH"])
+        except (KeyError, ValueError):
+            score_home, score_away = None, None
+        
+        fixtures.append(Fixture(time, fields.get("AE", "").strip(), fields.get("AF", "").strip(),
+                                score_home=score_home, score_away=score_away, is_televised=False,
+                                country=country.strip(), league=league.strip(), url=url))
+    return fixtures
+
+
 class FlashScoreSearchResult:
     def __init__(self, **kwargs):
         self.logo_url = None
@@ -404,6 +695,25 @@ class FlashScoreSearchResult:
             logo = logo.value_of_css_property('background-image')
             self.logo_url = logo.strip("url(").strip(")").strip('"')
     
+    @property
+    def tags(self) -> typing.List[str]:
+        # Same format as Fixture.full_league, "COUNTRY: League"
+        return [self.title] if getattr(self, "title", None) else []
+    
+    def remember_logo(self):
+        # A cache hit never loads the page, so keep the logo from whichever capture did.
+        if self.logo_url is None:
+            self.logo_url = _logos.get(self.link)
+        else:
+            _logos[self.link] = self.logo_url
+    
+    def parse_logo(self, tree):
+        # Read from page source rather than the driver, the source may have come from the page cache.
+        style = "".join(tree.xpath('.//div[contains(@class,"logo")]/@style'))
+        if "url(" in style:
+            logo = style.split("url(")[1].split(")")[0].strip('"\'')
+            self.logo_url = logo.split("/image/data/")[-1]
+    
     @property
     async def base_embed(self) -> discord.Embed:
         e = discord.Embed()
@@ -428,20 +738,50 @@ class FlashScoreSearchResult:
         e.timestamp = datetime.datetime.now()
         return e
     
-    def fetch_fixtures(self, driver, subpage) -> typing.List[Fixture]:
-        link = self.link + subpage
-        src = selenium_driver.get_html(driver, link, './/div[@class="sportName soccer"]')
-        
-        # Ugly, but, whatever.
+    async def fetch_feed(self, session, subpage, games=None) -> typing.Optional[typing.List[Fixture]]:
+        """ Read fixtures from the page's embedded feeds over plain HTTP, None if there aren't any. """
         try:
-            logo = driver.find_element_by_xpath('.//div[contains(@class,"logo")]')
-            if logo != "none":
-                logo = logo.value_of_css_property('background-image')
-                self.logo_url = logo.strip("url(").strip(")").strip('"')
-        except NoSuchElementException:
-            pass
+            async with session.get(self.link + subpage, headers=FEED_HEADERS) as resp:
+                if resp.status != 200:
+                    return None
+                src = await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+        
+        # The team overview page carries both summary-fixtures and summary-results.
+        wanted = subpage.strip('/')
+        feeds = [data for name, data in INITIAL_FEED.findall(src) if not wanted or name.endswith(wanted)]
+        if not feeds:
+            return None
         
+        if self.logo_url is None:
+            self.parse_logo(html.fromstring(src))
+        fixtures = [fixture for data in feeds for fixture in parse_feed(data, games)]
+        if any(i.time is None for i in fixtures):
+            return None  # A live game with no known minute, the rendered page shows it.
+        return fixtures
+    
+    async def get_fixtures(self, bot, subpage, **kwargs) -> typing.List[Fixture]:
+        """ Fixtures over HTTP if possible, falls back to a browser page load. """
+        fixtures = await self.fetch_feed(bot.session, subpage, getattr(bot, "games", None))
+        if fixtures is None:
+            fixtures = await self.parse_page(bot, self.parse_fixtures, subpage, FIXTURES_XPATH, **kwargs)
+        return fixtures
+    
+    async def parse_page(self, bot, parser, subpage, xpath, *args, **kwargs):
+        """ Run parser(src, *args) off the event loop over a page from the page cache. A browser is only leased
+        when nobody else has loaded or is loading the page. """
+        src = await selenium_driver.page_cache.fetch(bot.browsers, self.link + subpage, xpath,
+                                                     command=parser.__qualname__, **kwargs)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, parser, src, *args)
+    
+    def fetch_fixtures(self, driver, subpage) -> typing.List[Fixture]:
+        return self.parse_fixtures(selenium_driver.get_html(driver, self.link + subpage, FIXTURES_XPATH))
+    
+    def parse_fixtures(self, src) -> typing.List[Fixture]:
         tree = html.fromstring(src)
+        self.parse_logo(tree)
         fixture_rows = tree.xpath('.//div[contains(@class,"sportName soccer")]/div')
         
         league, country = None, None
@@ -552,25 +892,109 @@ class Competition(FlashScoreSearchResult):
         self.fetch_logo(driver)
         return image
     
-    def bracket(self, driver) -> BytesIO:
+    async def get_standings(self, bot) -> typing.Tuple[typing.List[str], typing.List[tuple]]:
+        return await self.parse_page(bot, self.parse_standings, "/standings/", STANDINGS_XPATH, tags=self.tags)
+    
+    def parse_standings(self, src) -> typing.Tuple[typing.List[str], typing.List[tuple]]:
+        """ Parse the standings grid, returns (value column headers, [(rank, team, badge url, [values])]) """
+        xp = STANDINGS_XPATH
+        tree = html.fromstring(src)
+        self.parse_logo(tree)
+        
+        headers = tree.xpath(f'{xp}//div[contains(@class,"table__headerCell")]/@title') or \
+            tree.xpath(f'{xp}//div[contains(@class,"table__headerCell")]//text()')
+        headers = [i.strip() for i in headers if i.strip()]
+        
+        rows = []
+        for i in tree.xpath(f'{xp}//div[contains(@class,"table__row")]'):
+            rank = "".join(i.xpath('.//div[contains(@class,"tableCellRank")]//text()')).strip(' .')
+            name = "".join(i.xpath('.//*[contains(@class,"tableCellParticipant__name")]//text()')).strip()
+            badge = "".join(i.xpath('.//img[contains(@class,"participant__image")]/@src'))
+            if badge.startswith('/'):
+                badge = "https://www.flashscore.com" + badge
+            values = [v.strip() for v in i.xpath('.//span[contains(@class,"table__cell--value")]//text()') if v.strip()]
+            if name and values:
+                rows.append((rank, name, badge, values))
+        
+        # Header cells also cover rank, team & form, keep the ones lining up with the value columns.
+        columns = max([len(i[3]) for i in rows], default=0)
+        headers = [i for i in headers if i not in ("#", "Team", "Form")][:columns]
+        if len(headers) != columns:
+            headers = ["MP", "W", "D", "L", "G", "PTS"][:columns]
+        return headers, rows
+    
+    async def table_image(self, bot) -> typing.Optional[BytesIO]:
+        """ Draw the table with PIL from parsed standings, or fall back to a screenshot.
+        A goal in the league invalidates the drawing & the cached standings page together, by the league's tag. """
+        key = (self.link + "/standings/", "rendered table")
+        image = await selenium_driver.image_cache.get(key)
+        if image is not None:
+            self.remember_logo()
+            return image
+        
+        try:
+            headers, rows = await self.get_standings(bot)
+        except (IndexError, ValueError):
+            rows = None
+        if not rows:
+            image = await cached_image(bot, (self.link + "/standings/", "table"), self.get_table, TABLE_IMAGE_TTL,
+                                       *self.tags)
+            self.remember_logo()
+            return image
+        self.remember_logo()
+        
+        title = getattr(self, "title", "")
+        badges = await fetch_badges(bot.session, [i[2] for i in rows])
+        loop = asyncio.get_event_loop()
+        data = await loop.run_in_executor(image_utils.get_render_pool(), image_utils.render_table, title, headers,
+                                          rows, badges)
+        image = BytesIO(data)
+        await selenium_driver.image_cache.put(key, image, TABLE_IMAGE_TTL, self.tags)
+        image.seek(0)
+        return image
+    
+    def bracket_captures(self, driver) -> typing.Union[BytesIO, typing.List[bytes], None]:
+        """ The whole bracket in one screenshot if it can be un-clipped, otherwise scroll & capture each part. """
         url = self.link + "/draw/"
         xp = './/div[@id="box-table-type--1"]'
         multi = (By.PARTIAL_LINK_TEXT, 'scroll right »')
         clicks = [(By.XPATH, ".//span[@class='button cookie-law-accept']")]
         script = "document.getElementsByClassName('playoff-scroll-button')[0].style.display = 'none';" \
                  "document.getElementsByClassName('playoff-scroll-button')[1].style.display = 'none';"
-        captures = selenium_driver.get_image(driver, url, xpath=xp, clicks=clicks, delete=FLASH_SCORE_ADS,
-                                             multi_capture=(multi, script),
-                                             failure_message="Unable to find a bracket for that competition")
-        self.fetch_logo(driver)  # For base_embed.
         
-        return image_utils.stitch(captures)
+        image = selenium_driver.get_image(driver, url, xpath=xp, clicks=clicks, delete=FLASH_SCORE_ADS,
+                                          full_width=True)
+        if image is None:
+            driver.refresh()  # Undo the un-clipping before paging through it.
+            image = selenium_driver.get_image(driver, url, xpath=xp, clicks=clicks, delete=FLASH_SCORE_ADS,
+                                              multi_capture=(multi, script),
+                                              failure_message="Unable to find a bracket for that competition")
+        self.fetch_logo(driver)  # For base_embed.
+        return image
     
-    def scorers(self, driver) -> typing.List[Player]:
-        xp = ".//div[@class='tabs__group']"
+    async def bracket_image(self, bot) -> typing.Optional[BytesIO]:
+        key = (self.link + "/draw/", "bracket")
+        image = await selenium_driver.image_cache.get(key)
+        if image is None:
+            image = await bot.browsers.run(self.bracket_captures)
+            if not image:
+                return None
+            
+            # Stitch after the driver's been handed back, in a worker process.
+            if isinstance(image, list):
+                loop = asyncio.get_event_loop()
+                image = BytesIO(await loop.run_in_executor(image_utils.get_render_pool(), image_utils.stitch, image))
+            await selenium_driver.image_cache.put(key, image, TABLE_IMAGE_TTL, self.tags)
+            image.seek(0)
+        self.remember_logo()
+        return image
+    
+    async def get_scorers(self, bot) -> typing.List[Player]:
         clicks = [(By.ID, "tabitem-top_scorers")]
-        src = selenium_driver.get_html(driver, self.link + "/standings", xp, clicks=clicks)
-        
+        xp = ".//div[@class='tabs__group']"
+        return await self.parse_page(bot, self.parse_scorers, "/standings", xp, clicks=clicks)
+    
+    def parse_scorers(self, src) -> typing.List[Player]:
         tree = html.fromstring(src)
         rows = tree.xpath('.//div[@id="table-type-10"]//div[contains(@class,"table__row")]')
         
@@ -595,7 +1019,7 @@ class Competition(FlashScoreSearchResult):
             flag = transfer_tools.get_flag(country)
             players.append(Player(rank=rank, flag=flag, name=name, link=p_url, team=tm, team_link=tm_url,
                                   goals=int(goals), assists=assists))
-        self.fetch_logo(driver)
+        self.parse_logo(tree)
         return players
 
 
@@ -616,9 +1040,10 @@ class Team(FlashScoreSearchResult):
         # Example Team URL: https://www.flashscore.com/team/thailand-stars/jLsL0hAF/
         return f"https://www.flashscore.com/team/{self.url}/{self.id}"
     
-    def players(self, driver, tab=0) -> typing.List[Player]:
-        xp = './/div[contains(@class,"playerTable")]'
-        src = selenium_driver.get_html(driver, self.link + "/squad", xp)
+    async def get_players(self, bot, tab=0) -> typing.List[Player]:
+        return await self.parse_page(bot, self.parse_players, "/squad", './/div[contains(@class,"playerTable")]', tab)
+    
+    def parse_players(self, src, tab=0) -> typing.List[Player]:
         tree = html.fromstring(src)
         tab += 1  # tab is Indexed at 0 but xpath indexes from [1]
         rows = tree.xpath(f'.//div[contains(@class, "playerTable")][{tab}]//div[contains(@class,"profileTable__row")]')
@@ -667,11 +1092,12 @@ class Team(FlashScoreSearchResult):
             players.append(pl)
         return players
     
-    def player_competitions(self, driver) -> typing.List[str]:
-        xp = './/div[contains(@class, "subTabs")]'
-        src = selenium_driver.get_html(driver, self.link + '/squad', xp)
+    async def get_player_competitions(self, bot) -> typing.List[str]:
+        return await self.parse_page(bot, self.parse_player_competitions, "/squad", SUB_TABS_XPATH)
+    
+    def parse_player_competitions(self, src) -> typing.List[str]:
         tree = html.fromstring(src)
-        options = tree.xpath(xp + "/div/text()")
+        options = tree.xpath(SUB_TABS_XPATH + "/div/text()")
         options = [i.strip() for i in options]
         return options
     
@@ -680,7 +1106,14 @@ class Team(FlashScoreSearchResult):
         return results[0]
     
     def next_fixture(self, driver) -> typing.List[Fixture]:
-        fixtures = self.fetch_fixtures(driver, "")
+        return self.upcoming(self.fetch_fixtures(driver, ""))
+    
+    async def get_next_fixture(self, bot, **kwargs) -> typing.List[Fixture]:
+        return self.upcoming(await self.get_fixtures(bot, "", **kwargs))
+    
+    @staticmethod
+    def upcoming(fixtures) -> typing.List[Fixture]:
+        """ The next unplayed fixture in each competition """
         competitions = []
         for i in fixtures:
             if i.score_home is not None:
@@ -722,42 +1155,9 @@ class Stadium:
         self.__dict__.update(kwargs)
     
     async def fetch_more(self):
-        this = dict()
-        async with aiohttp.ClientSession() as cs:
-            async with cs.get(self.url) as resp:
-                src = await resp.text()
-        tree = html.fromstring(src)
-        this['image'] = "".join(tree.xpath('.//div[@class="page-img"]/img/@src'))
-        # Teams
-        old = tree.xpath('.//tr/th[contains(text(), "Former home")]/following-sibling::td')
-        home = tree.xpath('.//tr/th[contains(text(), "home to")]/following-sibling::td')
-        
-        for s in home:
-            team_list = []
-            links = s.xpath('.//a/@href')
-            teams = s.xpath('.//a/text()')
-            for x, y in list(zip(teams, links)):
-                if "/team/" in y:
-                    team_list.append(f"[{x}]({y})")
-            this['home'] = team_list
-        
-        for s in old:
-            team_list = []
-            links = s.xpath('.//a/@href')
-            teams = s.xpath('.//a/text()')
-            for x, y in list(zip(teams, links)):
-                if "/team/" in y:
-                    team_list.append(f"[{x}]({y})")
-            this['old'] = team_list
-        
-        this['map_link'] = "".join(tree.xpath('.//figure/img/@src'))
-        this['address'] = "".join(tree.xpath('.//tr/th[contains(text(), "Address")]/following-sibling::td//text()'))
-        this['capacity'] = "".join(tree.xpath('.//tr/th[contains(text(), "Capacity")]/following-sibling::td//text()'))
-        this['cost'] = "".join(tree.xpath('.//tr/th[contains(text(), "Cost")]/following-sibling::td//text()'))
-        this['website'] = "".join(tree.xpath('.//tr/th[contains(text(), "Website")]/following-sibling::td//text()'))
-        this['att'] = "".join(
-            tree.xpath('.//tr/th[contains(text(), "Record attendance")]/following-sibling::td//text()'))
-        return this
+        async with http_client.get_client().cached(self.url) as resp:
+            src = await resp.text()
+        return await html_parser.parse("stadium", src)
     
     @property
     def to_picker_row(self) -> str:
@@ -812,85 +1212,35 @@ class Stadium:
 # Factory methods.
 async def get_goals() -> typing.List[Goal]:
     goals = []
-    async with aiohttp.ClientSession() as cs:
-        async with cs.get('https://www.scorebat.com/video-api/v1/') as resp:
-            data = await resp.json()
-            
-        for match in data:
-            for video in match['videos']:
-                if "highlights" not in video['title'].lower():
-                    this_goal = Goal(embed=video['embed'], home=match['side1']['name'], away=match['side2']['name'],
-                                     competition=match['competition']['name'], title=video['title'])
-                    goals.append(this_goal)
+    async with http_client.get_client().get('https://www.scorebat.com/video-api/v1/') as resp:
+        data = await resp.json()
+    
+    for match in data:
+        for video in match['videos']:
+            if "highlights" not in video['title'].lower():
+                this_goal = Goal(embed=video['embed'], home=match['side1']['name'], away=match['side2']['name'],
+                                 competition=match['competition']['name'], title=video['title'])
+                goals.append(this_goal)
     return goals
 
 
 async def get_stadiums(query) -> typing.List[Stadium]:
     qry = urllib.parse.quote_plus(query)
-    async with aiohttp.ClientSession() as cs:
-        async with cs.get(f'https://www.footballgroundmap.com/search/{qry}') as resp:
-            src = await resp.text()
+    async with http_client.get_client().get(f'https://www.footballgroundmap.com/search/{qry}') as resp:
+        src = await resp.text()
     
-    tree = html.fromstring(src)
-    results = tree.xpath(".//div[@class='using-grid'][1]/div[@class='grid']/div")
-    stadiums = []
-    for i in results:
-        team = "".join(i.xpath('.//small/preceding-sibling::a//text()')).title()
-        team_badge = i.xpath('.//img/@src')[0]
-        ctry_league = i.xpath('.//small/a//text()')
-        
-        if not ctry_league:
-            continue
-        country = ctry_league[0]
-        try:
-            league = ctry_league[1]
-        except IndexError:
-            league = ""
-        
-        sub_nodes = i.xpath('.//small/following-sibling::a')
-        for s in sub_nodes:
-            name = "".join(s.xpath('.//text()')).title()
-            link = "".join(s.xpath('./@href'))
-            
-            if query.lower() not in name.lower() and query.lower() not in team.lower():
-                continue  # Filtering.
-            
-            if not any(c.name == name for c in stadiums) and not any(c.url == link for c in stadiums):
-                stadiums.append(Stadium(url=link, name=name, team=team, team_badge=team_badge,
-                                        country=country, league=league))
-    return stadiums
+    rows = await html_parser.parse("stadium_search", src, query)
+    return [Stadium(**i) for i in rows]
 
 
-async def get_fs_results(query) -> typing.List[FlashScoreSearchResult]:
-    qry_debug = query
-
-    for r in ["'", "[", "]", "#", '<', '>']:  # Fucking morons.
-        query = query.replace(r, "")
-        
-    query = urllib.parse.quote(query)
-    async with aiohttp.ClientSession() as cs:
-        # One day we could probably expand upon this if we figure out what the other variables are.
-        async with cs.get(f"https://s.flashscore.com/search/?q={query}&l=1&s=1&f=1%3B1&pid=2&sid=1") as resp:
-            res = await resp.text(encoding="utf-8")
-            assert resp.status == 200, f"Server returned a {resp.status} error, please try again later."
-    
-    # Un-fuck FS JSON reply.
-    res = res.lstrip('cjs.search.jsonpCallback(').rstrip(");")
-    try:
-        res = json.loads(res, encoding='utf-8')
-    except JSONDecodeError:
-        print(f"Json error attempting to decode query: {query}\n", res, f"\nString that broke it: {qry_debug}")
-        raise AssertionError('Something you typed broke the search query. Please only specify a team or league name.')
-    
-    try:
-        filtered = [i for i in res['results'] if i['participant_type_id'] in (0, 1)]
-    except KeyError:
-        return []
-    return [Team(**i) if i['participant_type_id'] == 1 else Competition(**i) for i in filtered]
+async def get_fs_results(query, session=None) -> typing.List[FlashScoreSearchResult]:
+    results = await flashscore_search.service.search(query, session)
+    # Fresh objects every time, callers hang logos and other bits off them.
+    return [Team(**i) if i['participant_type_id'] == 1 else Competition(**i) for i in results]
 
 
 async def fs_search(ctx, query):
-    search_results = await get_fs_results(query)
+    search_results = await get_fs_results(query, session=ctx.bot.session)
     search_results = [i for i in search_results if i.participant_type_id == 0]  # Filter out non-leagues
     item_list = [i.title for i in search_results]
     index = await embed_utils.page_selector(ctx, item_list)
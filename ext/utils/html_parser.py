@@ -0,0 +1,85 @@
+""" Parse scraped pages off the event loop: scrapers hand over the raw page & the name of an extractor,
+a process pool hands back plain data. """
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import typing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from lxml import etree, html
+
+WORKERS = 2
+
+try:
+    parse_pool
+except NameError:
+    parse_pool = None  # Survives reloads of this module, created on first use.
+    extractors = {}  # name: (module, function name)
+    stats = Counter()
+
+
+def extractor(name):
+    """ Register a function that takes a parsed page & any extra args and returns picklable data.
+    Workers import the function's module, so it should only live in ext.utils.extractors.
+    Get its XPaths from xpath() so each worker only compiles them once. """
+    def decorator(func):
+        extractors[name] = (func.__module__, func.__name__)
+        return func
+    return decorator
+
+
+@functools.lru_cache(maxsize=None)
+def xpath(expression) -> etree.XPath:
+    """ Compiled on first use in each process, then reused for every page after. """
+    return etree.XPath(expression)
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    global parse_pool
+    if parse_pool is None:
+        # Spawned rather than forked, a fork would copy the bot's threads, sockets & event loop into every worker.
+        # Each worker re-imports core.py as __mp_main__, so it pays for discord & co once, but never starts a bot.
+        parse_pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return parse_pool
+
+
+def reset_pool():
+    global parse_pool
+    if parse_pool is not None:
+        parse_pool.shutdown(wait=False)
+        parse_pool = None
+
+
+def run(module, func, src, args):
+    """ What the workers actually do, the extractor's module is only imported once per worker. """
+    func = getattr(importlib.import_module(module), func)
+    return func(html.fromstring(src), *args)
+
+
+def lookup(name) -> typing.Tuple[str, str]:
+    """ The (module, function name) registered for name, importing ext.utils.extractors on first use. """
+    if name not in extractors:
+        importlib.import_module("ext.utils.extractors")
+    return extractors[name]
+
+
+def extract(name, src: typing.Union[bytes, str], *args):
+    """ Run a named extractor right here, for code that's already off the event loop. """
+    return run(*lookup(name), src, args)
+
+
+async def parse(name, src: typing.Union[bytes, str], *args):
+    """ Run a named extractor over a page in the parse pool. """
+    module, func = lookup(name)
+    stats[name] += 1
+    loop = asyncio.get_event_loop()
+    try:
+        return await loop.run_in_executor(get_parse_pool(), run, module, func, src, args)
+    except BrokenProcessPool:
+        # A worker died mid parse, start fresh ones for the next page.
+        stats["broken"] += 1
+        reset_pool()
+        raise
@@ -0,0 +1,316 @@
+""" The one HTTP client every cog & util shares: pooled keep-alive connections, per host timeouts & stats. """
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import re
+import time
+import typing
+import urllib.parse
+from collections import Counter, OrderedDict, defaultdict, deque
+
+import aiohttp
+import yarl
+
+# Seconds, anything not listed gets DEFAULT_TIMEOUT.
+HOST_TIMEOUTS = {
+    "www.flashscore.mobi": 10,
+    "s.flashscore.com": 8,
+    "www.flashscore.com": 15,
+    "www.transfermarkt.co.uk": 20,
+    "www.scorebat.com": 15,
+    "www.footballgroundmap.com": 15,
+    "api.imgur.com": 30,
+}
+DEFAULT_TIMEOUT = 30
+CONNECT_TIMEOUT = 5
+HEADERS = {"Accept-Encoding": "gzip, deflate"}
+
+# Scraped pages that barely change: (url pattern, seconds fresh, further seconds a stale copy is served while refreshing)
+CACHE_TTLS = [
+    (re.compile(r"livesoccertv\.com"), 15 * 60, 60 * 60),  # Listings change near kick off, don't serve old ones.
+    (re.compile(r"transfermarkt\.co\.uk/.*/geruechte/"), 30 * 60, 7 * 24 * 60 * 60),
+    (re.compile(r"transfermarkt\.co\.uk/.*/transfers/"), 60 * 60, 7 * 24 * 60 * 60),
+    (re.compile(r"bbc\.co\.uk/sport/football/.*/table"), 10 * 60, 24 * 60 * 60),
+    (re.compile(r"footballgroundmap\.com"), 7 * 24 * 60 * 60, 90 * 24 * 60 * 60),
+]
+CACHE_DEFAULT_TTL = (5 * 60, 60 * 60)
+CACHE_DIR = "http_cache"
+CACHE_MAX_BYTES = 64 * 2 ** 20
+
+
+class HostStats:
+    """ Request counts & latencies per upstream host, fed by aiohttp's trace hooks. """
+    def __init__(self, samples=200):
+        self.requests = Counter()
+        self.errors = Counter()
+        self.statuses = defaultdict(Counter)
+        self.latency = defaultdict(lambda: deque(maxlen=samples))
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self.on_request_start)
+        trace.on_request_end.append(self.on_request_end)
+        trace.on_request_exception.append(self.on_request_exception)
+        return trace
+
+    @staticmethod
+    async def on_request_start(session, ctx, params):
+        ctx.start = time.perf_counter()
+
+    async def on_request_end(self, session, ctx, params):
+        host = params.url.host
+        self.requests[host] += 1
+        self.statuses[host][params.response.status] += 1
+        self.latency[host].append(time.perf_counter() - ctx.start)
+
+    async def on_request_exception(self, session, ctx, params):
+        host = params.url.host
+        self.requests[host] += 1
+        self.errors[host] += 1
+
+    def summary(self) -> typing.List[tuple]:
+        """ [(host, requests, errors, p50, p95)], busiest first """
+        output = []
+        for host, count in self.requests.most_common():
+            v = sorted(self.latency[host])
+            p50 = v[len(v) // 2] if v else 0
+            p95 = v[int(len(v) * 0.95)] if v else 0
+            output.append((host, count, self.errors[host], p50, p95))
+        return output
+
+
+class CachedResponse:
+    """ Just enough of an aiohttp.ClientResponse for the scrapers: status, url, read() & text() """
+    def __init__(self, meta, body, stale=False):
+        self.url = meta["url"]
+        self.status = meta["status"]
+        self.encoding = meta.get("encoding") or "utf-8"
+        self.age = time.time() - meta["fetched"]
+        self.stale = stale
+        self.body = body
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def text(self, encoding=None) -> str:
+        return self.body.decode(encoding or self.encoding, errors="replace")
+
+
+class ResponseCache:
+    """ Successful GETs kept on disk, least recently used dropped first once over max_bytes. """
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key: {url, status, encoding, fetched, size}
+        self.inflight = {}  # key: Task refreshing it
+        self.size = 0
+        self.stats = Counter()
+        self.loaded = False
+
+    @staticmethod
+    def ttl(url) -> typing.Tuple[int, int]:
+        for pattern, fresh, stale in CACHE_TTLS:
+            if pattern.search(url):
+                return fresh, stale
+        return CACHE_DEFAULT_TTL
+
+    def path(self, key) -> str:
+        return os.path.join(self.directory, key)
+
+    # Disk, these run in the executor.
+    def scan(self) -> OrderedDict:
+        """ Entries already on disk, oldest first """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return OrderedDict()
+
+        found = []
+        for name in names:
+            path = self.path(name)
+            try:
+                if name.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                with open(path, "rb") as f:
+                    meta = json.loads(f.readline())
+                meta["size"] = os.path.getsize(path)
+                found.append((os.path.getmtime(path), name, meta))
+            except (OSError, ValueError):
+                continue
+        return OrderedDict((name, meta) for _, name, meta in sorted(found))
+
+    def read(self, key) -> typing.Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                f.readline()  # Skip the metadata.
+                return f.read()
+        except OSError:
+            return None
+
+    def write(self, key, meta, body) -> int:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n")
+            f.write(body)
+            size = f.tell()
+        os.replace(tmp, self.path(key))
+        return size
+
+    def remove(self, keys):
+        for key in keys:
+            with contextlib.suppress(OSError):
+                os.remove(self.path(key))
+
+    # Bookkeeping, only ever touched from the event loop.
+    def store(self, key, meta, size) -> typing.List[str]:
+        """ Record a written entry, returns the keys evicted to make room for it """
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old["size"]
+        self.entries[key] = dict(meta, size=size)
+        self.size += size
+
+        evicted = []
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            victim, dropped = self.entries.popitem(last=False)
+            self.size -= dropped["size"]
+            evicted.append(victim)
+        self.stats["evicted"] += len(evicted)
+        return evicted
+
+    def forget(self, key):
+        meta = self.entries.pop(key, None)
+        if meta is not None:
+            self.size -= meta["size"]
+
+    async def get(self, session, url, params=None, **kwargs) -> CachedResponse:
+        """ Fresh copies are served as is, stale ones are served while refreshing in the background,
+        anything older waits on upstream and only comes back if upstream fails. """
+        url = str(yarl.URL(str(url)).update_query(params)) if params else str(url)
+        key = hashlib.sha1(url.encode()).hexdigest()
+        loop = asyncio.get_event_loop()
+
+        if not self.loaded:
+            self.loaded = True
+            found = await loop.run_in_executor(None, self.scan)
+            found.update(self.entries)  # Anything fetched while we were scanning is newer.
+            self.entries = found
+            self.size = sum(i["size"] for i in found.values())
+
+        meta = self.entries.get(key)
+        if meta is not None:
+            fresh, stale = self.ttl(url)
+            age = time.time() - meta["fetched"]
+            if age < fresh + stale:
+                body = await loop.run_in_executor(None, self.read, key)
+                if body is None:
+                    self.forget(key)
+                else:
+                    self.entries.move_to_end(key)
+                    if age < fresh:
+                        self.stats["fresh"] += 1
+                        return CachedResponse(meta, body)
+                    self.stats["stale"] += 1
+                    self.refresh(session, key, url, kwargs)
+                    return CachedResponse(meta, body, stale=True)
+
+        self.stats["misses"] += 1
+        return await asyncio.shield(self.refresh(session, key, url, kwargs))
+
+    def refresh(self, session, key, url, kwargs) -> asyncio.Task:
+        """ One request upstream per url, however many commands want it at once """
+        task = self.inflight.get(key)
+        if task is None:
+            task = self.inflight[key] = asyncio.ensure_future(self.fetch(session, key, url, kwargs))
+            task.add_done_callback(lambda t: self.inflight.pop(key, None))
+            # Background refreshes have nobody waiting on them, don't warn about their errors.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def fetch(self, session, key, url, kwargs) -> CachedResponse:
+        loop = asyncio.get_event_loop()
+        meta = body = error = None
+        try:
+            async with session.get(url, **kwargs) as resp:
+                body = await resp.read()
+                meta = {"url": str(resp.url), "status": resp.status, "encoding": resp.charset, "fetched": time.time()}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            error = err
+
+        if meta is not None and meta["status"] == 200:
+            self.stats["fetched"] += 1
+            try:
+                size = await loop.run_in_executor(None, self.write, key, meta, body)
+            except OSError as err:
+                print(f"Unable to cache {url}: {err}")
+            else:
+                evicted = self.store(key, meta, size)
+                if evicted:
+                    await loop.run_in_executor(None, self.remove, evicted)
+            return CachedResponse(meta, body)
+
+        # Upstream is down or erroring, any copy we still have beats nothing.
+        old = self.entries.get(key)
+        if old is not None:
+            cached = await loop.run_in_executor(None, self.read, key)
+            if cached is not None:
+                self.stats["fallback"] += 1
+                return CachedResponse(old, cached, stale=True)
+
+        self.stats["errors"] += 1
+        if meta is None:
+            raise error
+        return CachedResponse(meta, body)
+
+
+class HTTPClient:
+    """ Drop in for an aiohttp.ClientSession, requests get a timeout picked by host unless one is passed. """
+    def __init__(self, loop=None, limit=100, limit_per_host=8):
+        self.stats = HostStats()
+        self.cache = ResponseCache()
+        connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host, ttl_dns_cache=300,
+                                         keepalive_timeout=30, enable_cleanup_closed=True, loop=loop)
+        self.session = aiohttp.ClientSession(connector=connector, headers=HEADERS, loop=loop,
+                                             trace_configs=[self.stats.trace_config()])
+
+    def __getattr__(self, item):
+        # closed, cookie_jar, close() etc. all come straight from the session.
+        return getattr(self.session, item)
+
+    @staticmethod
+    def timeout(url) -> aiohttp.ClientTimeout:
+        host = urllib.parse.urlparse(str(url)).hostname
+        return aiohttp.ClientTimeout(total=HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT), sock_connect=CONNECT_TIMEOUT)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout(url))
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def cached(self, url, **kwargs):
+        """ A GET answered from the disk cache where CACHE_TTLS allows, use in place of get() for scraped pages. """
+        yield await self.cache.get(self, url, **kwargs)
+
+
+client: typing.Optional[HTTPClient] = None
+
+
+def get_client() -> HTTPClient:
+    """ The bot's client, or one made on first use for utils running outside the bot. """
+    global client
+    if client is None or client.closed:
+        client = HTTPClient(loop=asyncio.get_event_loop())
+    return client
@@ -1,20 +1,112 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from io import BytesIO
-from PIL import Image
-from typing import List
+from PIL import Image, ImageDraw, ImageFont
+from typing import Dict, List
 
+# Table colours
+BACKGROUND = "#1e1f24"
+STRIPE = "#26272d"
+HEADER = "#0f4c81"
+TEXT = "#ffffff"
+MUTED = "#aab0bc"
+ROW_HEIGHT = 30
+BADGE_SIZE = 20
 
-def stitch(images: List[Image.Image]) -> BytesIO:
-	""" Stich images side by side """
-	# images is a list of opened PIL images.
-	w = int(images[0].width / 3 * 2 + sum(i.width / 3 for i in images))
-	h = images[0].height
+
+def stitch(images: List[bytes]) -> bytes:
+	""" Stich PNG captures side by side, each overlapping the last by two thirds. Returns PNG bytes. """
+	# Only the headers are read up front, each capture is decoded, pasted and closed in turn.
+	sizes = []
+	for i in images:
+		with Image.open(BytesIO(i)) as im:
+			sizes.append(im.size)
+	
+	w = int(sizes[0][0] / 3 * 2 + sum(i[0] / 3 for i in sizes))
+	h = sizes[0][1]
 	canvas = Image.new('RGB', (w, h))
 	x = 0
-	for i in images:
-		canvas.paste(i, (x, 0))
-		x += int(i.width / 3)
+	for i, size in zip(images, sizes):
+		with Image.open(BytesIO(i)) as im:
+			canvas.paste(im, (x, 0))
+		x += int(size[0] / 3)
 	output = BytesIO()
-	canvas.save(output, 'PNG')
+	canvas.save(output, 'PNG', compress_level=3)
+	canvas.close()
+	return output.getvalue()
+
+
+@lru_cache(maxsize=8)
+def font(size: int) -> ImageFont.ImageFont:
+	""" Fonts are loaded once per process """
+	try:
+		return ImageFont.truetype('Whitney-Medium.ttf', size)
+	except OSError:
+		try:
+			return ImageFont.load_default(size)
+		except TypeError:  # Older Pillow, fixed size bitmap font.
+			return ImageFont.load_default()
+
+
+@lru_cache(maxsize=512)
+def badge(data: bytes) -> Image.Image:
+	im = Image.open(BytesIO(data)).convert("RGBA")
+	im.thumbnail((BADGE_SIZE, BADGE_SIZE))
+	return im
+
+
+def render_table(title: str, headers: List[str], rows: List[tuple], badges: Dict[str, bytes]) -> bytes:
+	""" Draw a league table, rows are (rank, team name, badge url, [values]). Returns PNG bytes. """
+	f, bold = font(15), font(17)
+	d = ImageDraw.Draw(Image.new("RGB", (1, 1)))
 	
-	output.seek(0)
-	return output
+	name_width = max([d.textlength(i[1], font=f) for i in rows] + [100])
+	value_widths = [d.textlength(str(v), font=f) for i in rows for v in i[3]]
+	value_width = max(value_widths + [d.textlength(i, font=f) for i in headers] + [24]) + 16
+	columns = max([len(i[3]) for i in rows] + [len(headers)])
+	width = int(40 + BADGE_SIZE + 12 + name_width + 16 + value_width * columns + 10)
+	height = ROW_HEIGHT * (len(rows) + 2)
+	
+	im = Image.new("RGB", (width, height), BACKGROUND)
+	d = ImageDraw.Draw(im)
+	d.rectangle((0, 0, width, ROW_HEIGHT * 2), fill=HEADER)
+	d.text((10, ROW_HEIGHT // 2), title, font=bold, fill=TEXT, anchor="lm")
+	
+	right = width - 10
+	for n, h in enumerate(reversed(headers[:columns])):
+		d.text((right - n * value_width - value_width // 2, ROW_HEIGHT * 3 // 2), h, font=f, fill=MUTED, anchor="mm")
+	
+	for n, (rank, name, badge_url, values) in enumerate(rows):
+		y = ROW_HEIGHT * (n + 2)
+		if n % 2:
+			d.rectangle((0, y, width, y + ROW_HEIGHT), fill=STRIPE)
+		mid = y + ROW_HEIGHT // 2
+		d.text((30, mid), str(rank), font=f, fill=MUTED, anchor="rm")
+		if badge_url in badges:
+			try:
+				b = badge(badges[badge_url])
+				im.paste(b, (40 + (BADGE_SIZE - b.width) // 2, mid - b.height // 2), b)
+			except OSError:
+				pass  # Broken image, skip the badge.
+		d.text((40 + BADGE_SIZE + 12, mid), name, font=f, fill=TEXT, anchor="lm")
+		for i, v in enumerate(reversed(values)):
+			d.text((right - i * value_width - value_width // 2, mid), str(v), font=f, fill=TEXT, anchor="mm")
+	
+	output = BytesIO()
+	im.save(output, 'PNG', optimize=False, compress_level=3)
+	return output.getvalue()
+
+
+try:
+	render_pool
+except NameError:
+	render_pool = None  # Survives reloads of this module, created on first use.
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+	global render_pool
+	if render_pool is None:
+		# Spawned like html_parser's pool, workers re-run core.py's imports but never start the bot.
+		render_pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+	return render_pool
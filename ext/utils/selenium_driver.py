@@ -1,4 +1,16 @@
+import asyncio
+import contextlib
+import datetime
+import functools
+import hashlib
+import heapq
+import itertools
 import os
+import threading
+import time
+import urllib.parse
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 import typing
@@ -11,6 +23,67 @@ from selenium.webdriver import DesiredCapabilities
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.support.wait import WebDriverWait
+from selenium.common.exceptions import WebDriverException
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # Memory based recycling is skipped without it.
+
+
+# Third party hosts that flashscore pulls ads, trackers & video from. Requests to these never leave the browser.
+BLOCKED_HOSTS = [
+    "doubleclick.net", "googlesyndication.com", "googletagservices.com", "googletagmanager.com",
+    "google-analytics.com", "adservice.google.com", "amazon-adsystem.com", "adnxs.com", "criteo.com", "criteo.net",
+    "rubiconproject.com", "pubmatic.com", "openx.net", "casalemedia.com", "taboola.com", "outbrain.com",
+    "scorecardresearch.com", "quantserve.com", "moatads.com", "adsafeprotected.com", "smartadserver.com",
+    "teads.tv", "bidswitch.net", "facebook.net", "hotjar.com", "rollbar.com",
+]
+
+# Route blocked hosts to a closed local port so they fail instantly, everything else goes direct.
+BLOCKING_PAC = "data:text/javascript," + urllib.parse.quote(
+    "function FindProxyForURL(url, host) {"
+    f"var blocked = {BLOCKED_HOSTS!r};"
+    "for (var i = 0; i < blocked.length; i++) {"
+    "if (host == blocked[i] || dnsDomainIs(host, '.' + blocked[i])) {return 'PROXY 127.0.0.1:9';}}"
+    "return 'DIRECT';}")
+
+BROWSER_PREFS = {
+    "network.proxy.type": 2,
+    "network.proxy.autoconfig_url": BLOCKING_PAC,
+    "browser.display.use_document_fonts": 0,  # No web font downloads.
+    "gfx.downloadable_fonts.enabled": False,
+    "media.autoplay.default": 5,  # Block all autoplay.
+    "media.autoplay.blocking_policy": 2,
+    "media.mediasource.enabled": False,
+    "media.hardware-video-decoding.enabled": False,
+    "dom.webnotifications.enabled": False,
+    "dom.push.enabled": False,
+    "geo.enabled": False,
+    "permissions.default.desktop-notification": 2,
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "browser.sessionhistory.max_total_viewers": 0,
+    "toolkit.telemetry.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+}
+
+# OneTrust consent cookies, set once per host so the banner never renders.
+CONSENT_COOKIES = {
+    "OptanonAlertBoxClosed": lambda: datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+    "OptanonConsent": lambda: "isIABGlobal=false&interactionCount=1&landingPath=NotLandingPage"
+                              "&groups=C0001%3A1%2CC0002%3A0%2CC0003%3A0%2CC0004%3A0%2CC0005%3A0",
+}
+
+# Cookie accept buttons we don't need to wait for once the consent cookies are in place.
+CONSENT_BUTTONS = [(By.XPATH, ".//span[@class='button cookie-law-accept']"),
+                   (By.XPATH, './/div[@id="onetrust-accept-btn-handler"]')]
+
+REMOVE_NODES = """
+for (const xpath of arguments[0]) {
+    const nodes = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (let i = 0; i < nodes.snapshotLength; i++) {nodes.snapshotItem(i).remove();}
+}"""
 
 
 def spawn_driver():
@@ -18,13 +91,618 @@ def spawn_driver():
     caps["pageLoadStrategy"] = "normal"
     options = Options()
     options.add_argument("--headless")
+    for k, v in BROWSER_PREFS.items():
+        options.set_preference(k, v)
     driver_path = os.getcwd() + '\\geckodriver.exe'
     driver = webdriver.Firefox(options=options, desired_capabilities=caps, executable_path=driver_path)
     return driver
 
 
+def accept_consent(driver):
+    host = urllib.parse.urlparse(driver.current_url).hostname
+    if not host or host in driver.consented:
+        return
+    for name, value in CONSENT_COOKIES.items():
+        try:
+            driver.add_cookie({"name": name, "value": value(), "path": "/"})
+        except WebDriverException:
+            return  # about:blank, error pages etc.
+    driver.consented.add(host)
+
+
+# Lease priorities, lower goes first.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class DriverPool:
+    """ A pool of headless browsers, each leased to one caller at a time. """
+    def __init__(self, size=2, max_navigations=250, max_memory=1024, lease_timeout=120, warm=1):
+        self.size = size
+        self.warm = min(warm, size)  # Drivers to start in the background after login.
+        self.max_navigations = max_navigations
+        self.max_memory = max_memory  # MB, browser process and its children.
+        self.lease_timeout = lease_timeout
+        
+        # Own threads so browser work never queues behind PIL / praw in the default executor.
+        # Spare threads cover calls that timed out but are still stuck in selenium.
+        self.executor = ThreadPoolExecutor(max_workers=size * 2, thread_name_prefix="browser")
+        
+        self.drivers = set()
+        self.idle = []
+        self.waiters = []  # heap of (priority, sequence, future)
+        self.sequence = itertools.count()
+        self.spawning = 0
+        self.recycled = 0
+        
+        # Metrics
+        self.leases = Counter()
+        self.timeouts = Counter()
+        self.waits = {INTERACTIVE: deque(maxlen=500), BACKGROUND: deque(maxlen=500)}
+    
+    def __repr__(self):
+        return f"DriverPool({len(self.drivers)}/{self.size} drivers, {len(self.idle)} idle, {self.depth} waiting)"
+    
+    @property
+    def depth(self) -> int:
+        return sum(1 for i in self.waiters if not i[2].done())
+    
+    def stats(self) -> dict:
+        """ Queue depth and lease wait times in seconds, per priority. """
+        output = {"drivers": len(self.drivers), "idle": len(self.idle), "depth": self.depth, "recycled": self.recycled}
+        for priority, name in [(INTERACTIVE, "interactive"), (BACKGROUND, "background")]:
+            waits = sorted(self.waits[priority])
+            output[name] = {
+                "leases": self.leases[priority],
+                "timeouts": self.timeouts[priority],
+                "queued": sum(1 for i in self.waiters if i[0] == priority and not i[2].done()),
+                "mean": sum(waits) / len(waits) if waits else 0,
+                "p95": waits[int(len(waits) * 0.95)] if waits else 0,
+                "max": waits[-1] if waits else 0
+            }
+        return output
+    
+    @contextlib.asynccontextmanager
+    async def lease(self, priority=INTERACTIVE, timeout=None):
+        """ Lease a driver, raises asyncio.TimeoutError if none frees up in time. """
+        queued = time.perf_counter()
+        try:
+            driver = await asyncio.wait_for(self._acquire(priority), timeout or self.lease_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[priority] += 1
+            raise
+        self.leases[priority] += 1
+        self.waits[priority].append(time.perf_counter() - queued)
+        try:
+            yield driver
+        finally:
+            await self._release(driver)
+    
+    async def run(self, func, *args, priority=INTERACTIVE, timeout=None, command=None, **kwargs):
+        """ Lease a driver and run func(*args, driver=driver, **kwargs) on the pool's threads.
+        Phase timings are recorded under command, or func's name if not given. """
+        loop = asyncio.get_event_loop()
+        async with self.lease(priority) as driver:
+            driver.command = command or getattr(func, '__qualname__', str(func))
+            ftp = functools.partial(func, *args, driver=driver, **kwargs)
+            try:
+                result = await asyncio.wait_for(loop.run_in_executor(self.executor, ftp), timeout or self.lease_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # Timed out, or the caller was cancelled. Either way the worker thread can't be cancelled and is still
+                # driving the browser, so retire it rather than hand it to the next lease.
+                driver.navigations = self.max_navigations
+                raise
+            return result
+    
+    async def prewarm(self):
+        """ Start browsers one at a time in the background, so the first commands don't wait on Firefox. """
+        loop = asyncio.get_event_loop()
+        while len(self.drivers) + self.spawning < self.warm:
+            start = time.perf_counter()
+            self.spawning += 1
+            try:
+                driver = await loop.run_in_executor(self.executor, spawn_driver)
+            except WebDriverException as err:
+                return print(f"Browser pre-warm failed: {err}")
+            finally:
+                self.spawning -= 1
+            self.drivers.add(driver)
+            self._hand_off(driver)
+            print(f"Browser pre-warmed in {time.perf_counter() - start:.2f}s ({len(self.drivers)}/{self.size})")
+    
+    async def _acquire(self, priority):
+        loop = asyncio.get_event_loop()
+        while True:
+            while self.idle:
+                driver = self.idle.pop()
+                if _alive(driver):
+                    return driver
+                await self._discard(driver)
+            
+            if len(self.drivers) + self.spawning < self.size:
+                self.spawning += 1
+                spawn = loop.run_in_executor(self.executor, spawn_driver)
+                try:
+                    driver = await asyncio.shield(spawn)
+                except asyncio.CancelledError:
+                    # Timed out or cancelled while Firefox is still starting: pool it once it's up rather than leak it.
+                    spawn.add_done_callback(self._adopt)
+                    raise
+                except Exception:
+                    self.spawning -= 1
+                    raise
+                self.spawning -= 1
+                self.drivers.add(driver)
+                return driver
+            
+            waiter = loop.create_future()
+            heapq.heappush(self.waiters, (priority, next(self.sequence), waiter))
+            try:
+                driver = await waiter
+            except asyncio.CancelledError:
+                # Timed out or cancelled after being handed a driver: pass it on rather than leak it.
+                if waiter.done() and not waiter.cancelled() and waiter.result() is not None:
+                    self._hand_off(waiter.result())
+                raise
+            
+            if driver is not None:
+                return driver
+            # None means a driver was retired, so there's room to spawn a new one.
+    
+    def _adopt(self, spawn):
+        """ Done callback for a spawn whose caller went away """
+        self.spawning -= 1
+        if spawn.cancelled() or spawn.exception() is not None:
+            self._wake(None)  # Room for someone else to try.
+            return
+        driver = spawn.result()
+        self.drivers.add(driver)
+        self._hand_off(driver)
+    
+    async def _release(self, driver):
+        loop = asyncio.get_event_loop()
+        if not await loop.run_in_executor(self.executor, self._healthy, driver):
+            await self._discard(driver)
+            self.recycled += 1
+            self._wake(None)
+            return
+        self._hand_off(driver)
+    
+    def _hand_off(self, driver):
+        if not self._wake(driver):
+            self.idle.append(driver)
+    
+    def _wake(self, driver) -> bool:
+        while self.waiters:
+            waiter = heapq.heappop(self.waiters)[2]
+            if not waiter.done():
+                waiter.set_result(driver)
+                return True
+        return False
+    
+    def _healthy(self, driver) -> bool:
+        if getattr(driver, "navigations", 0) >= self.max_navigations:
+            return False
+        if _memory(driver) > self.max_memory:
+            return False
+        try:
+            driver.current_url
+        except WebDriverException:
+            return False
+        return True
+    
+    async def _discard(self, driver):
+        self.drivers.discard(driver)
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(self.executor, driver.quit)
+        except WebDriverException:
+            pass
+    
+    def close(self):
+        for i in list(self.drivers):
+            try:
+                i.quit()
+            except WebDriverException:
+                pass
+        self.drivers.clear()
+        self.idle.clear()
+        self.executor.shutdown(wait=False)
+
+
+def _alive(driver) -> bool:
+    try:
+        return driver.service.process.poll() is None
+    except AttributeError:
+        return True
+
+
+def _memory(driver) -> float:
+    if psutil is None:
+        return 0
+    try:
+        process = psutil.Process(driver.capabilities["moz:processID"])
+        rss = process.memory_info().rss + sum(i.memory_info().rss for i in process.children(recursive=True))
+    except (KeyError, psutil.Error):
+        return 0
+    return rss / 2 ** 20
+
+
+# Seconds to keep rendered page source, first matching url fragment wins.
+PAGE_TTLS = [
+    ("/match/", 60),
+    ("/squad", 6 * 60 * 60),
+    ("/standings", 30 * 60),
+    ("/results", 10 * 60),
+    ("/fixtures", 5 * 60),
+]
+DEFAULT_PAGE_TTL = 120
+
+
+class PageCache:
+    """ LRU cache of rendered page source. Lives on the event loop, so hits & requests waiting on someone else's
+    page load never lease a browser. """
+    def __init__(self, max_entries=256, ttls=None, default_ttl=DEFAULT_PAGE_TTL):
+        self.max_entries = max_entries
+        self.ttls = PAGE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        
+        self.entries = OrderedDict()  # key: (expires, source, tags)
+        self.inflight = {}  # key: Task, so identical requests share one navigation.
+        self.epoch = 0  # Bumped by invalidate, tagged loads that started before it aren't cached.
+        self.stats = Counter()
+    
+    def __repr__(self):
+        return f"PageCache({len(self.entries)}/{self.max_entries} pages, {dict(self.stats)})"
+    
+    def ttl(self, url) -> int:
+        for fragment, seconds in self.ttls:
+            if fragment in url:
+                return seconds
+        return self.default_ttl
+    
+    async def fetch(self, browsers, url, xpath, priority=INTERACTIVE, timeout=None, tags=(), command=None,
+                    **kwargs) -> str:
+        """ Page source from the cache, or from a single browser page load shared with anyone else asking.
+        Tagged pages can be dropped early with invalidate, the same tags as the ImageCache.
+        command names the caller in the browser timings, a shared load is timed under whoever asked first. """
+        # Clicks & scripts change what the page source looks like, so they're part of the key.
+        key = (url, xpath, repr(sorted(kwargs.items())))
+        try:
+            expires, src, _ = self.entries[key]
+        except KeyError:
+            pass
+        else:
+            if expires > time.monotonic():
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return src
+            del self.entries[key]
+        
+        task = self.inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            tags = {ImageCache.tag(i) for i in tags if i}
+            load = self.load(key, browsers, url, xpath, priority, timeout, tags, command, kwargs)
+            task = self.inflight[key] = asyncio.ensure_future(load)
+        else:
+            self.stats["coalesced"] += 1
+        # One caller giving up shouldn't cancel the page load for everyone else waiting on it.
+        return await asyncio.shield(task)
+    
+    async def load(self, key, browsers, url, xpath, priority, timeout, tags, command, kwargs) -> str:
+        def navigate(driver):
+            return get_html(driver, url, xpath, **kwargs)
+        
+        epoch = self.epoch
+        try:
+            src = await browsers.run(navigate, priority=priority, timeout=timeout, command=command)
+        finally:
+            del self.inflight[key]
+        
+        if tags and epoch != self.epoch:
+            return src  # Invalidated mid load, it may have read the page from before whatever changed.
+        self.entries[key] = (time.monotonic() + self.ttl(url), src, tags)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        return src
+    
+    def invalidate(self, *tags) -> int:
+        tags = {ImageCache.tag(i) for i in tags if i}
+        keys = [key for key, (expires, src, entry_tags) in self.entries.items() if entry_tags & tags]
+        for key in keys:
+            del self.entries[key]
+        self.epoch += 1
+        self.stats["invalidated"] += len(keys)
+        return len(keys)
+    
+    def clear(self):
+        self.entries.clear()
+
+
+try:
+    page_cache
+except NameError:
+    page_cache = PageCache()  # Keep cached pages when football.py reloads this module.
+
+
+class ImageCache:
+    """ Screenshots by capture key, held in memory then spilled to disk, bounded by total bytes.
+    Bookkeeping happens on the event loop, reads & writes of spilled images go to the default executor. """
+    def __init__(self, directory=None, max_memory=64 * 2 ** 20, max_disk=512 * 2 ** 20, max_age=24 * 60 * 60):
+        self.directory = directory or os.path.join(os.getcwd(), "image_cache")
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.max_age = max_age  # Spilled files older than this are left over from a previous run.
+        
+        self.keys = {}  # key: (digest, expires, tags)
+        self.tags = {}  # tag: set of keys
+        self.refs = Counter()  # digest: keys pointing at it, identical images are only stored once.
+        self.memory = OrderedDict()  # digest: png bytes, LRU order
+        self.spilling = {}  # digest: png bytes, while they're being written out.
+        self.disk = OrderedDict()  # digest: size, LRU order
+        self.memory_bytes = self.disk_bytes = 0
+        self.swept = False
+        self.stats = Counter()
+    
+    def __repr__(self):
+        return f"ImageCache({len(self.keys)} images, {self.memory_bytes / 2 ** 20:.1f}MB memory, " \
+               f"{self.disk_bytes / 2 ** 20:.1f}MB disk, {dict(self.stats)})"
+    
+    @staticmethod
+    def tag(name) -> str:
+        return str(name).lower()
+    
+    async def get(self, key) -> typing.Optional[BytesIO]:
+        try:
+            digest, expires, tags = self.keys[key]
+        except KeyError:
+            self.stats["misses"] += 1
+            return None
+        
+        if expires < time.monotonic():
+            self._remove(key)
+            self.stats["misses"] += 1
+            return None
+        
+        data = self.memory.get(digest) or self.spilling.get(digest)
+        if data is not None:
+            with contextlib.suppress(KeyError):
+                self.memory.move_to_end(digest)
+        else:
+            loop = asyncio.get_event_loop()
+            try:
+                data = await loop.run_in_executor(None, self._read, digest)
+            except OSError:
+                if self.keys.get(key, (None,))[0] == digest:
+                    self._remove(key)
+                self.stats["misses"] += 1
+                return None
+            if digest in self.disk:
+                self._promote(digest, data)
+                await self._spill()
+        
+        self.stats["hits"] += 1
+        return BytesIO(data)
+    
+    async def put(self, key, image: BytesIO, ttl, tags=()):
+        data = image.getvalue()
+        digest = hashlib.sha1(data).hexdigest()
+        tags = {self.tag(i) for i in tags if i}
+        self._expire()
+        if key in self.keys:
+            self._remove(key)
+        self.keys[key] = (digest, time.monotonic() + ttl, tags)
+        for i in tags:
+            self.tags.setdefault(i, set()).add(key)
+        self.refs[digest] += 1
+        if digest not in self.memory and digest not in self.spilling and digest not in self.disk:
+            self.memory[digest] = data
+            self.memory_bytes += len(data)
+            await self._spill()
+    
+    async def capture(self, browsers, key, capture, ttl, tags=(), **kwargs) -> typing.Optional[BytesIO]:
+        """ Return the cached image for key, or lease a browser to run capture(driver) and cache what it returns. """
+        image = await self.get(key)
+        if image is not None:
+            return image
+        
+        image = await browsers.run(capture, **kwargs)
+        if image is None:
+            return None
+        await self.put(key, image, ttl, tags)
+        image.seek(0)
+        return image
+    
+    def invalidate(self, *tags) -> int:
+        keys = set().union(*[self.tags.pop(self.tag(i), set()) for i in tags])
+        for key in keys:
+            self._remove(key)
+        self.stats["invalidated"] += len(keys)
+        return len(keys)
+    
+    def clear(self):
+        for key in list(self.keys):
+            self._remove(key)
+    
+    def _path(self, digest):
+        return os.path.join(self.directory, f"{digest}.png")
+    
+    def _read(self, digest) -> bytes:
+        with open(self._path(digest), "rb") as f:
+            return f.read()
+    
+    def _write(self, digest, data):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(digest), "wb") as f:
+            f.write(data)
+    
+    def _unlink(self, digests):
+        for digest in digests:
+            with contextlib.suppress(OSError):
+                os.remove(self._path(digest))
+    
+    def _sweep(self):
+        """ Remove spilled files nothing could still be pointing at, rather than wiping the directory, another
+        process may be importing this module while the bot's running. """
+        cutoff = time.time() - self.max_age
+        with contextlib.suppress(OSError):
+            for entry in os.scandir(self.directory):
+                with contextlib.suppress(OSError):
+                    if entry.name.endswith(".png") and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+    
+    def _discard(self, *digests):
+        # Deleting files is still disk I/O, do it off the event loop.
+        if digests:
+            asyncio.get_event_loop().run_in_executor(None, self._unlink, digests)
+    
+    def _expire(self):
+        now = time.monotonic()
+        for key in [k for k, (digest, expires, tags) in self.keys.items() if expires < now]:
+            self._remove(key)
+            self.stats["expired"] += 1
+    
+    def _remove(self, key):
+        digest, expires, tags = self.keys.pop(key)
+        for i in tags:
+            keys = self.tags.get(i)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[i]
+        
+        self.refs[digest] -= 1
+        if self.refs[digest] > 0:
+            return
+        del self.refs[digest]
+        
+        data = self.memory.pop(digest, None)
+        if data is not None:
+            self.memory_bytes -= len(data)
+        size = self.disk.pop(digest, None)
+        if size is not None:
+            self.disk_bytes -= size
+            self._discard(digest)
+    
+    def _promote(self, digest, data):
+        # Read back from disk, move it back into memory.
+        size = self.disk.pop(digest, None)
+        if size is not None:
+            self.disk_bytes -= size
+            self._discard(digest)
+        self.memory[digest] = data
+        self.memory_bytes += len(data)
+    
+    async def _spill(self):
+        loop = asyncio.get_event_loop()
+        if not self.swept:
+            self.swept = True
+            await loop.run_in_executor(None, self._sweep)
+        
+        while self.memory_bytes > self.max_memory and self.memory:
+            digest, data = self.memory.popitem(last=False)
+            self.memory_bytes -= len(data)
+            self.spilling[digest] = data
+            try:
+                await loop.run_in_executor(None, self._write, digest, data)
+            except OSError:
+                continue  # Dropped, the key will miss and be re-captured.
+            finally:
+                del self.spilling[digest]
+            
+            if digest not in self.refs:
+                self._discard(digest)  # Removed while it was being written.
+                continue
+            self.disk[digest] = len(data)
+            self.disk_bytes += len(data)
+            self.stats["spilled"] += 1
+        
+        while self.disk_bytes > self.max_disk and self.disk:
+            digest, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            self._discard(digest)
+            self.stats["evictions"] += 1
+
+
+try:
+    image_cache
+except NameError:
+    image_cache = ImageCache()
+
+
+# Phases slower than this many seconds get logged.
+PHASE_THRESHOLDS = {"navigate": 8, "wait": 4.5, "delete": 1, "clicks": 4, "script": 1, "scroll": 1, "screenshot": 3,
+                    "encode": 1, "unclip": 2}
+# Sub-pages worth telling apart in url patterns.
+KNOWN_SUBPAGES = {"squad", "standings", "draw", "fixtures", "results"}
+
+
+def url_pattern(url) -> str:
+    """ Strip ids & names out of a url, e.g. https://www.flashscore.com/team/newcastle/p6ahwuwJ/squad -> team/squad """
+    parts = urllib.parse.urlparse(url)
+    segments = [i for i in parts.path.split('/') if i]
+    pattern = segments[0] if segments else (parts.hostname or "")
+    if len(segments) > 1 and segments[-1] in KNOWN_SUBPAGES:
+        pattern += "/" + segments[-1]
+    if parts.fragment:
+        pattern += "#" + parts.fragment.split(';')[0]
+    return pattern
+
+
+class PhaseStats:
+    """ Rolling samples of how long each browser phase takes, by command and url pattern. """
+    def __init__(self, samples=500):
+        self.samples = defaultdict(lambda: deque(maxlen=samples))
+        self.slow = Counter()
+        self.lock = threading.Lock()
+    
+    def record(self, command, pattern, phase, seconds):
+        with self.lock:
+            self.samples[(command, pattern, phase)].append(seconds)
+        if seconds > PHASE_THRESHOLDS.get(phase, 5):
+            self.slow[phase] += 1
+            print(f"{datetime.datetime.utcnow()} | Slow browser phase: {command} {pattern} {phase} took {seconds:.2f}s")
+    
+    def summary(self, qry=None) -> typing.List[tuple]:
+        """ [(command, pattern, phase, count, p50, p95, max)] for keys containing qry, slowest p95 first. """
+        with self.lock:
+            items = [(k, sorted(v)) for k, v in self.samples.items() if v]
+        output = []
+        for (command, pattern, phase), v in items:
+            if qry is not None and qry not in f"{command} {pattern} {phase}":
+                continue
+            output.append((command, pattern, phase, len(v), v[len(v) // 2], v[int(len(v) * 0.95)], v[-1]))
+        return sorted(output, key=lambda i: i[5], reverse=True)
+    
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.slow.clear()
+
+
+try:
+    phase_stats
+except NameError:
+    phase_stats = PhaseStats()
+
+
+@contextlib.contextmanager
+def timed(driver, url, phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        phase_stats.record(getattr(driver, "command", "?"), url_pattern(url), phase, seconds)
+
+
 def fetch(driver, url, xpath, **kwargs):
     # Only fetch if a new page is requested, kills off overhead and also stops annoying "stop refreshing" popups.
+    if not hasattr(driver, "consented"):
+        driver.consented = set()
+    
     try:
         alert = driver.switch_to.alert
         alert.accept()
@@ -32,38 +710,47 @@ def fetch(driver, url, xpath, **kwargs):
         # Expected error
         pass
     
+    consented = urllib.parse.urlparse(url).hostname in driver.consented
     if driver.current_url != url:
-        driver.get(url)
+        with timed(driver, url, "navigate"):
+            driver.get(url)
+            driver.navigations = getattr(driver, "navigations", 0) + 1
+            accept_consent(driver)
     
-    try:
-        element = WebDriverWait(driver, 5).until(ec.visibility_of_element_located((By.XPATH, xpath)))
-    except TimeoutException:
-        element = None  # Rip
-    except UnexpectedAlertPresentException:
-        element = None  # fuckin spammers.
+    with timed(driver, url, "wait"):
+        try:
+            element = WebDriverWait(driver, 5).until(ec.visibility_of_element_located((By.XPATH, xpath)))
+        except TimeoutException:
+            element = None  # Rip
+        except UnexpectedAlertPresentException:
+            element = None  # fuckin spammers.
     
-    # Delete floating ad banners or other shit that gets in the way
+    # Delete floating ad banners or other shit that gets in the way, all in one go, ads that were blocked won't exist.
     if "delete" in kwargs:
-        for z in kwargs['delete']:
-            try:
-                x = WebDriverWait(driver, 3).until(ec.presence_of_element_located(z))
-            except TimeoutException:
-                continue  # Element does not exist, do not need to delete it.
-            scr = """var z = arguments[0];z.parentNode.removeChild(z);"""
-            driver.execute_script(scr, x)
+        with timed(driver, url, "delete"):
+            xpaths = [z[1] for z in kwargs['delete'] if z[0] == By.XPATH]
+            if xpaths:
+                driver.execute_script(REMOVE_NODES, xpaths)
+            for z in [z for z in kwargs['delete'] if z[0] != By.XPATH]:
+                for x in driver.find_elements(*z):
+                    driver.execute_script("arguments[0].remove();", x)
     
     # Hide cookie popups, switch tabs, etc.
     if "clicks" in kwargs:
-        for z in kwargs['clicks']:
-            try:
-                x = WebDriverWait(driver, 3).until(ec.presence_of_element_located(z))
-                x.click()
-            except (TimeoutException, ElementNotInteractableException, StaleElementReferenceException):
-                pass  # Can't click on what we can't find.
+        with timed(driver, url, "clicks"):
+            for z in kwargs['clicks']:
+                if consented and z in CONSENT_BUTTONS:
+                    continue  # Banner was never shown.
+                try:
+                    x = WebDriverWait(driver, 3).until(ec.presence_of_element_located(z))
+                    x.click()
+                except (TimeoutException, ElementNotInteractableException, StaleElementReferenceException):
+                    pass  # Can't click on what we can't find.
     
     # Run any scripts
     if "script" in kwargs:
-        driver.execute_script(kwargs['script'])
+        with timed(driver, url, "script"):
+            driver.execute_script(kwargs['script'])
     
     return element
 
@@ -95,46 +782,93 @@ def get_element(driver, url, xpath, **kwargs):
     return element
 
 
-def get_image(driver, url, xpath, **kwargs) -> typing.Union[BytesIO, typing.List[Image.Image], None]:
+# Let a horizontally scrolling container grow to its full content width.
+UNCLIP = """
+const el = arguments[0];
+for (let n = el; n && n !== document.body; n = n.parentElement) {
+    n.style.overflow = 'visible'; n.style.maxWidth = 'none'; n.style.width = 'max-content';
+}
+for (const n of el.querySelectorAll('*')) {
+    if (getComputedStyle(n).overflowX !== 'visible') {n.style.overflow = 'visible';}
+}
+return Math.ceil(Math.max(el.scrollWidth, el.getBoundingClientRect().width));"""
+CLIPPED = "const el = arguments[0]; return el.scrollWidth > el.getBoundingClientRect().width + 2;"
+MAX_CAPTURE_WIDTH = 8000
+
+
+def capture_full_width(driver, element) -> typing.Optional[BytesIO]:
+    """ Un-clip the element and widen the window to fit it, one screenshot. None if it's still clipped. """
+    width = driver.execute_script(UNCLIP, element)
+    if not width or width > MAX_CAPTURE_WIDTH:
+        return None
+    
+    size = driver.get_window_size()
+    try:
+        if width + 40 > size["width"]:
+            driver.set_window_size(width + 40, size["height"])
+        if driver.execute_script(CLIPPED, element):
+            return None
+        return BytesIO(element.screenshot_as_png)
+    except StaleElementReferenceException:
+        return None
+    finally:
+        driver.set_window_size(size["width"], size["height"])
+
+
+def get_image(driver, url, xpath, **kwargs) -> typing.Union[BytesIO, typing.List[bytes], None]:
     element = fetch(driver, url, xpath, **kwargs)
     if element is None:
         return None
     
+    if kwargs.get("full_width"):
+        with timed(driver, url, "unclip"):
+            return capture_full_width(driver, element)
+    
     if "multi_capture" in kwargs:
         max_iter = 10
-        captures = [Image.open(BytesIO(element.screenshot_as_png))]
+        with timed(driver, url, "screenshot"):
+            captures = [element.screenshot_as_png]
         while max_iter > 0:
             locator = kwargs['multi_capture'][0]
-            try:
-                z = WebDriverWait(driver, 3).until(ec.visibility_of_element_located(locator))
-                z.click()
-            except TimeoutException:
-                break
-            except ElementNotInteractableException as err:
-                print(err, "\n", err.__traceback__)
-
-            driver.execute_script(kwargs['multi_capture'][1])
-            trg = driver.find_element_by_xpath(xpath)
-            captures.append(Image.open(BytesIO(trg.screenshot_as_png)))
+            with timed(driver, url, "scroll"):
+                try:
+                    z = WebDriverWait(driver, 3).until(ec.visibility_of_element_located(locator))
+                    z.click()
+                except TimeoutException:
+                    break
+                except ElementNotInteractableException as err:
+                    print(err, "\n", err.__traceback__)
+                driver.execute_script(kwargs['multi_capture'][1])
+            
+            with timed(driver, url, "screenshot"):
+                trg = driver.find_element_by_xpath(xpath)
+                captures.append(trg.screenshot_as_png)
             max_iter -= 1
         return captures
     else:
         try:
-            driver.execute_script("arguments[0].scrollIntoView();", element)
-            im = Image.open(BytesIO(element.screenshot_as_png))
+            with timed(driver, url, "scroll"):
+                driver.execute_script("arguments[0].scrollIntoView();", element)
+            with timed(driver, url, "screenshot"):
+                im = Image.open(BytesIO(element.screenshot_as_png))
         except StaleElementReferenceException:
-            element = WebDriverWait(driver, 3).until(ec.visibility_of_element_located((By.XPATH, xpath)))
-            driver.execute_script("arguments[0].scrollIntoView();", element)
-            im = Image.open(BytesIO(element.screenshot_as_png))
+            with timed(driver, url, "scroll"):
+                element = WebDriverWait(driver, 3).until(ec.visibility_of_element_located((By.XPATH, xpath)))
+                driver.execute_script("arguments[0].scrollIntoView();", element)
+            with timed(driver, url, "screenshot"):
+                im = Image.open(BytesIO(element.screenshot_as_png))
         except NoSuchElementException:
             try:
-                new_element = WebDriverWait(driver, 3).until(ec.visibility_of_element_located((By.XPATH, xpath)))
-                driver.execute_script("arguments[0].scrollIntoView();", new_element)
-                im = Image.open(BytesIO(new_element.screenshot_as_png))
+                with timed(driver, url, "scroll"):
+                    new_element = WebDriverWait(driver, 3).until(ec.visibility_of_element_located((By.XPATH, xpath)))
+                    driver.execute_script("arguments[0].scrollIntoView();", new_element)
+                with timed(driver, url, "screenshot"):
+                    im = Image.open(BytesIO(new_element.screenshot_as_png))
             except TimeoutException:
                 return None
         
-        output = BytesIO()
-        im.save(output, 'PNG')
-        output.seek(0)
+        with timed(driver, url, "encode"):
+            output = BytesIO()
+            im.save(output, 'PNG')
+            output.seek(0)
         return output
@@ -1,219 +1,9 @@
 import datetime
-import pycountry
 import discord
 import asyncio
-from lxml import html
 
-from ext.utils import embed_utils
-
-# Manual Country Code Flag Dict
-
-
-country_dict = {
-    "American Virgin Islands": "vi",
-    "Antigua and Barbuda": "ag",
-    "Bolivia": "bo",
-    "Bosnia-Herzegovina": "ba",
-    "Bosnia and Herzegovina": "ba",
-    "Botsuana": "bw",
-    "British Virgin Islands": "vg",
-    "Cape Verde": "cv",
-    "Cayman-Inseln": "ky",
-    "Chinese Taipei (Taiwan)": "tw",
-    "Congo DR": "cd",
-    "Curacao": "cw",
-    "DR Congo": "cd",
-    "Cote d'Ivoire": "ci",
-    "CSSR": "cz",
-    "Czech Republic": "cz",
-    "England": "gb",
-    "Faroe Island": "fo",
-    "Federated States of Micronesia": "fm",
-    "Hongkong": "hk",
-    "Iran": "ir",
-    "Ivory Coast": "ci",
-    "Korea, North": "kp",
-    "Korea, South": "kr",
-    "Kosovo": "xk",
-    "Laos": "la",
-    "Macedonia": "mk",
-    "Mariana Islands": "mp",
-    "Moldova": "md",
-    "N/A": "x",
-    "Netherlands Antilles": "nl",
-    "Neukaledonien": "nc",
-    "Northern Ireland": "gb",
-    "Osttimor": "tl",
-    "Palästina": "ps",
-    "Russia": "ru",
-    "Scotland": "gb",
-    "Sint Maarten": "sx",
-    "Southern Sudan": "ss",
-    "South Korea": "kr",
-    "St. Kitts & Nevis": "kn",
-    "St. Louis": "lc",
-    "St. Vincent & Grenadinen": "vc",
-    "Tahiti": "fp",
-    "Tanzania": "tz",
-    "The Gambia": "gm",
-    "Trinidad and Tobago": "tt",
-    "Turks- and Caicosinseln": "tc",
-    "Sao Tome and Princip": "st",
-    "USA": "us",
-    "Venezuela": "ve",
-    "Vietnam": "vn",
-    "Wales": "gb"}
-
-unidict = {
-    "a": "🇦", "b": "🇧", "c": "🇨", "d": "🇩", "e": "🇪",
-    "f": "🇫", "g": "🇬", "h": "🇭", "i": "🇮", "j": "🇯",
-    "k": "🇰", "l": "🇱", "m": "🇲", "n": "🇳", "o": "🇴",
-    "p": "🇵", "q": "🇶", "r": "🇷", "s": "🇸", "t": "🇹",
-    "u": "🇺", "v": "🇻", "w": "🇼", "x": "🇽", "y": "🇾", "z": "🇿"
-}
-
-
-def get_flag(country):
-    # Check if pycountry has country
-    if not country:
-        return
-    if country.lower() in ["england", "scotland", "wales"]:
-        country = f":{country.lower()}:"
-        return country
-
-    try:
-        country = pycountry.countries.get(name=country.title()).alpha_2
-    except (KeyError, AttributeError):
-        try:
-            # else revert to manual dict.w
-            country = country_dict[country]
-        except KeyError:
-            return country  # Shrug.
-    country = country.lower()
-
-    for key, value in unidict.items():
-        country = country.replace(key, value)
-    return country
-
-
-async def parse_players(trs):
-    output, targets = [], []
-    for i in trs:
-        pname = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()'))
-        player_link = "".join(i.xpath('.//a[@class="spielprofil_tooltip"]/@href'))
-        if "transfermarkt" not in player_link:
-            player_link = "http://transfermarkt.co.uk" + player_link
-
-        team = "".join(i.xpath('.//td[3]/a/img/@alt'))
-        tlink = "".join(i.xpath('.//td[3]/a/img/@href'))
-        if "transfermarkt" not in tlink:
-            tlink = "http://transfermarkt.co.uk" + tlink
-        age = "".join(i.xpath('.//td[4]/text()'))
-        ppos = "".join(i.xpath('.//td[2]/text()'))
-        flag = get_flag("".join(i.xpath('.//td/img[1]/@title')))
-
-        output.append(f"{flag} [{pname}]({player_link}) {age}, {ppos} [{team}]({tlink})")
-        targets.append(player_link)
-    return output, targets
-
-
-async def parse_managers(trs):
-    output, targets = [], []
-    for i in trs:
-        mname = "".join(i.xpath('.//td[@class="hauptlink"]/a/text()'))
-        mlink = "".join(i.xpath('.//td[@class="hauptlink"]/a/@href'))
-        if "transfermarkt" not in mlink:
-            mlink = "http://transfermarkt.co.uk" + mlink
-
-        team = "".join(i.xpath('.//td[2]/a/img/@alt'))
-        tlink = "".join(i.xpath('.//td[2]/a/img/@href'))
-        if "transfermarkt" not in tlink:
-            tlink = "http://transfermarkt.co.uk" + tlink
-        age = "".join(i.xpath('.//td[3]/text()'))
-        job = "".join(i.xpath('.//td[5]/text()'))
-        flag = get_flag("".join(i.xpath('.//td/img[1]/@title')))
-
-        output.append(f"{flag} [{mname}]({mlink}) {age}, {job} [{team}]({tlink})")
-        targets.append(mlink)
-    return output, targets
-
-
-async def parse_clubs(trs):
-    output, targets = [], []
-    for i in trs:
-        cname = "".join(i.xpath('.//td[@class="hauptlink"]/a/text()'))
-        clink = "".join(i.xpath('.//td[@class="hauptlink"]/a/@href'))
-        if "transfermarkt" not in clink:
-            clink = "http://transfermarkt.co.uk" + clink
-        league = "".join(i.xpath('.//tr[2]/td/a/text()'))
-        league_link = "".join(i.xpath('.//tr[2]/td/a/@href'))
-        flag = get_flag("".join(i.xpath('.//td/img[1]/@title')[-1]).strip())
-        if league:
-            club = f"[{cname}]({clink}) ([{league}]({league_link}))"
-        else:
-            club = f"[{cname}]({clink})"
-
-        output.append(f"{flag} {club}")
-        targets.append(clink)
-    return output, targets
-
-
-async def parse_refs(trs):
-    output, targets = [], []
-    for i in trs:
-        rname = "".join(i.xpath('.//td[@class="hauptlink"]/a/text()')).strip()
-        rlink = "".join(i.xpath('.//td[@class="hauptlink"]/a/@href')).strip()
-        if "transfermarkt" not in rlink:
-            rlink = "http://transfermarkt.co.uk" + rlink
-        
-        rage = "".join(i.xpath('.//td[@class="zentriert"]/text()')).strip()
-        flag = get_flag("".join(i.xpath('.//td/img[1]/@title')).strip())
-
-        output.append(f"{flag} [{rname}]({rlink}) {rage}")
-        targets.append(rlink)
-    return output, targets
-
-
-async def parse_leagues(trs):
-    output, targets = [], []
-    for i in trs:
-        cupname = "".join(i.xpath('.//td[2]/a/text()')).strip()
-        cup_link = "".join(i.xpath('.//td[2]/a/@href')).strip()
-        if "transfermarkt" not in cup_link:
-            cup_link = "http://transfermarkt.co.uk" + cup_link
-        flag = "".join(i.xpath('.//td[3]/img/@title')).strip()
-        if flag:
-            flag = get_flag(flag)
-        else:
-            flag = "🌍"
-
-        output.append(f"{flag} [{cupname}]({cup_link})")
-        targets.append(cup_link)
-    return output, targets
-
-
-async def parse_int(trs):
-    output, targets = [], []
-    for i in trs:
-        cup_name = "".join(i.xpath('.//td[2]/a/text()'))
-        cup_link = "".join(i.xpath('.//td[2]/a/@href'))
-        if "transfermarkt" not in cup_link:
-            cup_link = "http://transfermarkt.co.uk" + cup_link
-        output.append(f"🌍 [{cup_name}]({cup_link})")
-        targets.append(cup_link)
-    return output, targets
-
-
-async def parse_agent(trs):
-    output, targets = [], []
-    for i in trs:
-        company = "".join(i.xpath('.//td[2]/a/text()'))
-        link = "".join(i.xpath('.//td[2]/a/@href'))
-        if "transfermarkt" not in link:
-            link = "http://transfermarkt.co.uk" + link
-        output.append(f"[{company}]({link})")
-        targets.append(link)
-    return output, targets
+from ext.utils import embed_utils, html_parser
+from ext.utils.flags import get_flag
 
 
 async def fetch_page(ctx, category, query, page):
@@ -223,24 +13,21 @@ async def fetch_page(ctx, category, query, page):
         if resp.status != 200:
             await ctx.reply(f"HTTP Error connecting to transfermarkt: {resp.status}", mention_author=False)
             return None
-        tree = html.fromstring(await resp.text())
-    categ = cats[category]["cat"]
-
-    # Get trs of table after matching header / {categ} name.
-    matches = f".//div[@class='box']/div[@class='table-header'][contains(text(),'{categ}')]/following::div[" \
-              f"1]//tbody/tr"
+        src = await resp.text()
+    header, lines, targets = await html_parser.parse("transfermarkt_search", src, cats[category]["cat"],
+                                                     cats[category]["parser"])
 
     e = discord.Embed()
     e.colour = 0x1a3151
     e.url = str(resp.url)
-    e.set_author(name="".join(tree.xpath(f".//div[@class='table-header'][contains(text(),'{categ}')]/text()")))
+    e.set_author(name=header)
     e.description = ""
     try:
         total_pages = int("".join([i for i in e.author.name if i.isdigit()])) // 10 + 1
     except ValueError:
         total_pages = 0
     e.set_footer(text=f"Page {page} of {total_pages}")
-    return e, tree.xpath(matches), total_pages
+    return e, lines, targets, total_pages
 
 
 def make_embed(e, lines, targets, special):
@@ -263,11 +50,9 @@ def make_embed(e, lines, targets, special):
 
 async def search(ctx, qry, category, special=False, whitelist_fetch=False):
     page = 1
-    e, tree, total_pages = await fetch_page(ctx, category, qry, page)
-    if not tree:
+    e, lines, targets, total_pages = await fetch_page(ctx, category, qry, page)
+    if not lines:
         return await ctx.reply("No results.", mention_author=False)
-
-    lines, targets = await cats[category]["parser"](tree)
     
     if whitelist_fetch:
         return lines, targets
@@ -354,8 +139,7 @@ async def search(ctx, qry, category, special=False, whitelist_fetch=False):
                 pass
 
         # Fetch the next page of results.
-        e, tree, total_pages = await fetch_page(ctx, category, qry, page)
-        lines, targets = await cats[category]["parser"](tree)
+        e, lines, targets, total_pages = await fetch_page(ctx, category, qry, page)
         e, items = make_embed(e, lines, targets, special)  # reassign item dict.
         await m.edit(embed=e)
 
@@ -374,47 +158,14 @@ async def get_transfers(ctx, e, target):
     target = f"{target}/saison_id/{season_id}/pos//detailpos/0/w_s={period}"
     
     p = {"w_s": period}
-    async with ctx.bot.session.get(target, params=p) as resp:
+    async with ctx.bot.session.cached(target, params=p) as resp:
         if resp.status != 200:
             return await ctx.reply(f"Error {resp.status} connecting to {resp.url}", mention_author=False)
-        tree = html.fromstring(await resp.text())
+        src = await resp.text()
     
-    e.set_author(name="".join(tree.xpath('.//head/title/text()')), url=target)
+    title, inlist, inloans, outlist, outloans = await html_parser.parse("transfermarkt_transfers", src)
+    e.set_author(name=title, url=target)
     e.set_footer(text=discord.Embed.Empty)
-    ignore, intable, outtable = tree.xpath('.//div[@class="large-8 columns"]/div[@class="box"]')
-    
-    intable = intable.xpath('.//tbody/tr')
-    outtable = outtable.xpath('.//tbody/tr')
-    
-    inlist, inloans, outlist, outloans = [], [], [], []
-    
-    for i in intable:
-        pname = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()'))
-        player_link = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/@href'))
-        
-        player_link = f"http://transfermarkt.co.uk{player_link}"
-        age = "".join(i.xpath('.//td[3]/text()'))
-        ppos = "".join(i.xpath('.//td[2]//tr[2]/td/text()'))
-        try:
-            flag = get_flag(i.xpath('.//td[4]/img[1]/@title')[0])
-        except IndexError:
-            flag = ""
-        fee = "".join(i.xpath('.//td[6]//text()'))
-        if "loan" in fee.lower():
-            inloans.append(f"{flag} [{pname}]({player_link}) {ppos}, {age}\n")
-            continue
-        inlist.append(f"{flag} [{pname}]({player_link}) {ppos}, {age} ({fee})\n")
-    
-    for i in outtable:
-        pname = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()'))
-        player_link = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/@href'))
-        player_link = f"http://transfermarkt.co.uk{player_link}"
-        flag = get_flag(i.xpath('.//td/img[1]/@title')[1])
-        fee = "".join(i.xpath('.//td[6]//text()'))
-        if "loan" in fee.lower():
-            outloans.append(f"{flag} [{pname}]({player_link}), ")
-            continue
-        outlist.append(f"{flag} [{pname}]({player_link}), ")
     
     def write_field(title, input_list):
         output = ""
@@ -436,33 +187,15 @@ async def get_transfers(ctx, e, target):
 async def get_rumours(ctx, e, target):
     e.description = ""
     target = target.replace('startseite', 'geruechte')
-    async with ctx.bot.session.get(f"{target}") as resp:
+    async with ctx.bot.session.cached(target) as resp:
         if resp.status != 200:
             return await ctx.reply(f"Error {resp.status} connecting to {resp.url}", mention_author=False)
-        tree = html.fromstring(await resp.text())
+        src = await resp.text()
         e.url = str(resp.url)
-    e.set_author(name=tree.xpath('.//head/title[1]/text()')[0], url=str(resp.url))
-    e.set_footer(text=discord.Embed.Empty)
     
-    rumours = tree.xpath('.//div[@class="large-8 columns"]/div[@class="box"]')[0]
-    rumours = rumours.xpath('.//tbody/tr')
-    rumorlist = []
-    for i in rumours:
-        pname = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/text()'))
-        if not pname:
-            continue
-        player_link = "".join(i.xpath('.//td[@class="hauptlink"]/a[@class="spielprofil_tooltip"]/@href'))
-        player_link = f"http://transfermarkt.co.uk{player_link}"
-        ppos = "".join(i.xpath('.//td[2]//tr[2]/td/text()'))
-        flag = get_flag(i.xpath('.//td[3]/img/@title')[0])
-        age = "".join(i.xpath('./td[4]/text()')).strip()
-        team = "".join(i.xpath('.//td[5]//img/@alt'))
-        team_link = "".join(i.xpath('.//td[5]//img/@href'))
-        if "transfermarkt" not in team_link:
-            team_link = "http://www.transfermarkt.com" + team_link
-        source = "".join(i.xpath('.//td[8]//a/@href'))
-        src = f"[Info]({source})"
-        rumorlist.append(f"{flag} **[{pname}]({player_link})** ({src})\n{age}, {ppos} [{team}]({team_link})\n\n")
+    title, rumorlist = await html_parser.parse("transfermarkt_rumours", src)
+    e.set_author(name=title, url=str(resp.url))
+    e.set_footer(text=discord.Embed.Empty)
     
     output = ""
     count = 0
@@ -483,48 +216,48 @@ cats = {
             "players": {
                 "cat": "players",
                 "querystr": "Spieler_page",
-                "parser": parse_players
+                "parser": "players"
             },
             "managers": {
                 "cat": "Managers",
                 "querystr": "Trainer_page",
-                "parser": parse_managers
+                "parser": "managers"
             },
             "clubs": {
                 "cat": "Clubs",
                 "querystr": "Verein_page",
-                "parser": parse_clubs
+                "parser": "clubs"
             },
             "referees": {
                 "cat": "referees",
                 "querystr": "Schiedsrichter_page",
-                "parser": parse_refs
+                "parser": "referees"
             },
             "domestic competitions": {
                 "cat": "to competitions",
                 "querystr": "Wettbewerb_page",
-                "parser": parse_leagues
+                "parser": "leagues"
             },
             "international Competitions": {
                 "cat": "International Competitions",
                 "querystr": "Wettbewerb_page",
-                "parser": parse_int
+                "parser": "international"
             },
             "agent": {
                 "cat": "Agents",
                 "querystr": "page",
-                "parser": parse_agent
+                "parser": "agents"
             },
             "Transfers": {
                 "cat": "Clubs",
                 "querystr": "Verein_page",
-                "parser": parse_clubs,
+                "parser": "clubs",
                 "outfunc": get_transfers
             },
             "Rumours": {
                 "cat": "Clubs",
                 "querystr": "Verein_page",
-                "parser": parse_clubs,
+                "parser": "clubs",
                 "outfunc": get_rumours
             }
         }
@@ -0,0 +1,288 @@
+""" Offline record / replay benchmark for the live scores pipeline.
+
+Record a sequence of flashscore.mobi snapshots to disk:
+    python -m tools.scores_bench record snapshots --interval 60 --count 180
+
+Replay them through Scores.parse_games, merge_games and rendering against stub channels:
+    python -m tools.scores_bench replay snapshots --channels 10000 --whitelists 300
+
+Add --restart-at 5 to restart the cog before the fifth snapshot, it reloads the stored message ids like a real restart.
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import os
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+import aiohttp
+
+from ext import scores
+from ext.utils import football
+
+
+# Stub discord / database layer.
+class StubMessage:
+    def __init__(self, channel, message_id, content):
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+
+    async def edit(self, content):
+        self.channel.stats["edits"] += 1
+        self.content = content
+
+    async def delete(self):
+        self.channel.stats["deletes"] += 1
+        self.channel.messages.pop(self.id, None)
+
+
+class StubChannel:
+    ids = 0
+
+    def __init__(self, channel_id, stats):
+        self.id = channel_id
+        self.stats = stats
+        self.messages = {}
+
+    async def send(self, content):
+        self.stats["sends"] += 1
+        StubChannel.ids += 1
+        message = StubMessage(self, StubChannel.ids, content)
+        self.messages[message.id] = message
+        return message
+
+    async def purge(self):
+        self.stats["purges"] += 1
+        self.messages.clear()
+
+    async def delete_messages(self, messages):
+        self.stats["deletes"] += len(messages)
+        for i in messages:
+            self.messages.pop(i.id, None)
+
+    def get_partial_message(self, message_id):
+        return self.messages.get(message_id)
+
+
+class StubConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def transaction(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    # Only scores_messages is kept, the rest of the cog's queries are ignored.
+    async def execute(self, query, *args):
+        if "DELETE FROM scores_messages" in query:
+            self.db.messages.pop(args[0], None)
+
+    async def executemany(self, query, rows):
+        if "INSERT INTO scores_messages" in query:
+            for channel_id, message_id, position in rows:
+                self.db.messages.setdefault(channel_id, []).append(message_id)
+
+    async def fetch(self, query, *args):
+        if "FROM scores_messages" in query:
+            return [{"channel_id": c, "message_id": m} for c, ids in sorted(self.db.messages.items()) for m in ids]
+        return []
+
+
+class StubDB:
+    def __init__(self):
+        self.messages = {}  # channel_id: [message ids], what a restart reads back from scores_messages
+
+    async def acquire(self):
+        return StubConnection(self)
+
+    async def release(self, connection):
+        pass
+
+
+class StubBot:
+    def __init__(self, loop):
+        self.loop = loop
+        self.db = StubDB()
+        self.games = football.FixtureStore()
+        self.channels = {}
+        self.events = Counter()
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def dispatch(self, event, *args, **kwargs):
+        self.events[args[0] if args else event] += 1
+
+
+def make_cog(bot) -> scores.Scores:
+    # Skip Scores.__init__, it would start the real loop and hit the database.
+    cog = scores.Scores.__new__(scores.Scores)
+    cog.bot = bot
+    cog.init_state()
+    return cog
+
+
+def snapshots(directory):
+    return sorted(os.path.join(directory, i) for i in os.listdir(directory) if i.endswith(".html"))
+
+
+# Recording
+async def record(directory, interval, count):
+    os.makedirs(directory, exist_ok=True)
+    async with aiohttp.ClientSession() as session:
+        for n in range(count):
+            async with session.get(scores.LIVE_SCORES_URL) as resp:
+                src = await resp.read()
+                status = resp.status
+            path = os.path.join(directory, f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.html")
+            with open(path, "wb") as f:
+                f.write(src)
+            print(f"[{n + 1}/{count}] {path}: HTTP {status}, {len(src)} bytes")
+            if n + 1 < count:
+                await asyncio.sleep(interval)
+
+
+# Replay
+def make_channels(bot, cog, leagues, channels, whitelists, seed):
+    rng = random.Random(seed)
+    others = sorted(set(leagues) - set(scores.DEFAULT_LEAGUES))
+
+    # Most channels keep the defaults, the rest add a handful of extra leagues.
+    configs = [set(scores.DEFAULT_LEAGUES)]
+    for _ in range(whitelists - 1):
+        configs.append(set(scores.DEFAULT_LEAGUES) | set(rng.sample(others, min(len(others), rng.randint(1, 5)))))
+
+    stats = Counter()
+    for channel_id in range(1, channels + 1):
+        bot.channels[channel_id] = StubChannel(channel_id, stats)
+        whitelist = configs[0] if rng.random() < 0.5 else rng.choice(configs)
+        cog.cache[(channel_id // 5, channel_id)] = set(whitelist)
+    return stats
+
+
+async def restart(bot, cog) -> scores.Scores:
+    """ A fresh cog with the same channel config, that reloads its messages from the stub database. """
+    bot.games = football.FixtureStore()
+    new = make_cog(bot)
+    new.cache = cog.cache
+    await new.load_messages()
+    return new
+
+
+async def replay(directory, channels, whitelists, seed, trace_memory, restart_at=None):
+    files = snapshots(directory)
+    if not files:
+        return print(f"No snapshots found in {directory}")
+
+    # Leagues seen in the first snapshot seed the channel whitelists.
+    scratch = StubBot(asyncio.get_running_loop())
+    with open(files[0], "rb") as f:
+        leagues = {i.full_league for i in make_cog(scratch).parse_games(f.read(), scratch.games)}
+
+    bot = StubBot(asyncio.get_running_loop())
+    cog = make_cog(bot)
+    stats = make_channels(bot, cog, leagues, channels, whitelists, seed)
+    print(f"{len(files)} snapshots, {channels} channels, {whitelists} whitelists, {len(leagues)} leagues\n")
+
+    if trace_memory:
+        tracemalloc.start()
+
+    header = f"{'tick':>4} {'parse':>8} {'merge':>8} {'render':>8} {'edit':>8} {'changed':>7} {'channels':>8} " \
+             f"{'renders':>7} {'edits':>6} {'sends':>6} {'deletes':>7} {'peak MB':>8}"
+    print(header)
+
+    totals = Counter()
+    last_hash = None
+    for n, path in enumerate(files, 1):
+        with open(path, "rb") as f:
+            src = f.read()
+
+        if n == restart_at:
+            cog = await restart(bot, cog)
+            last_hash = None
+            print(f"{n:>4} restarted, {sum(len(i) for i in cog.msg_dict.values())} messages reloaded")
+
+        page_hash = hashlib.sha1(src).digest()
+        if page_hash == last_hash:
+            print(f"{n:>4} unchanged, skipped")
+            totals["skipped"] += 1
+            continue
+        last_hash = page_hash
+
+        stats.clear()
+        if trace_memory:
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        games = cog.parse_games(src, bot.games)
+        parsed = time.perf_counter()
+        changed = cog.merge_games(games)
+        merged = time.perf_counter()
+
+        # Render up front so the edit phase only measures the scheduler and the stub channels.
+        targets = cog.channels_to_update(changed)
+        renders = {frozenset(cog.game_cache.keys() & cog.cache[i]) for i in targets}
+        for i in renders:
+            cog.render(i)
+        rendered = time.perf_counter()
+        updated = await cog.push_updates(changed)
+        edited = time.perf_counter()
+
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace_memory else 0
+        print(f"{n:>4} {parsed - start:>8.4f} {merged - parsed:>8.4f} {rendered - merged:>8.4f} {edited - rendered:>8.4f} "
+              f"{len(changed):>7} {updated:>8} {len(renders):>7} {stats['edits']:>6} {stats['sends']:>6} "
+              f"{stats['deletes']:>7} {peak:>8.1f}")
+
+        totals["ticks"] += 1
+        totals["parse"] += parsed - start
+        totals["merge"] += merged - parsed
+        totals["render"] += rendered - merged
+        totals["edit"] += edited - rendered
+        totals["edits"] += stats["edits"]
+        totals["sends"] += stats["sends"]
+        totals["peak"] = max(totals["peak"], peak)
+
+    ticks = totals["ticks"] or 1
+    print(f"\n{totals['ticks']} ticks ({totals['skipped']} skipped as unchanged). Mean per tick: "
+          f"parse {totals['parse'] / ticks:.4f}s, merge {totals['merge'] / ticks:.4f}s, "
+          f"render {totals['render'] / ticks:.4f}s, edit {totals['edit'] / ticks:.4f}s, "
+          f"{totals['edits'] / ticks:.0f} edits, {totals['sends'] / ticks:.0f} sends. "
+          f"Peak memory {totals['peak']:.1f} MB. Events dispatched: {dict(bot.events)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    rec = sub.add_parser("record", help="Save flashscore.mobi snapshots to a directory")
+    rec.add_argument("directory")
+    rec.add_argument("--interval", type=float, default=60, help="Seconds between snapshots")
+    rec.add_argument("--count", type=int, default=60, help="Number of snapshots to take")
+
+    rep = sub.add_parser("replay", help="Replay saved snapshots through the scores pipeline")
+    rep.add_argument("directory")
+    rep.add_argument("--channels", type=int, default=1000)
+    rep.add_argument("--whitelists", type=int, default=100, help="Distinct league whitelists across the channels")
+    rep.add_argument("--seed", type=int, default=0)
+    rep.add_argument("--no-memory", action="store_true", help="Skip tracemalloc, it slows every phase down")
+    rep.add_argument("--restart-at", type=int, help="Restart the cog before this snapshot, numbered from 1")
+
+    args = parser.parse_args()
+    if args.mode == "record":
+        asyncio.run(record(args.directory, args.interval, args.count))
+    else:
+        asyncio.run(replay(args.directory, args.channels, args.whitelists, args.seed, not args.no_memory,
+                           args.restart_at))
+
+
+if __name__ == "__main__":
+    main()